@@ -0,0 +1,44 @@
+import os
+import random
+import struct
+import zlib
+
+PROFILES = {
+    'small': [(200, 64 * 1024, '.png')],
+    'large': [(4, 48 * 1024 * 1024, '.pdf')],
+    'mixed': [(150, 128 * 1024, '.png'), (40, 2 * 1024 * 1024, '.jpg'), (3, 30 * 1024 * 1024, '.pdf')]
+}
+
+def png_bytes(size, rng):
+    width = max(1, int((size / 3) ** 0.5))
+    rows = b''.join(b'\x00' + rng.randbytes(width * 3) for _ in range(width))
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, width, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'tEXt', b'Comment\x00benchmark')
+            + chunk(b'IDAT', zlib.compress(rows, 1)) + chunk(b'IEND', b''))
+
+def write_file(path, size, rng, block_size=1024 * 1024):
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            block = rng.randbytes(min(block_size, remaining))
+            f.write(block)
+            remaining -= len(block)
+
+def make_corpus(directory, profile, scale=1.0, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for count, size, extension in PROFILES[profile]:
+        for i in range(max(1, int(count * scale))):
+            path = os.path.join(directory, f"{profile}_{size // 1024}k_{i:05d}{extension}")
+            if extension == '.png':
+                with open(path, 'wb') as f:
+                    f.write(png_bytes(size, rng))
+            else:
+                write_file(path, size, rng)
+            files.append(path)
+    return files
@@ -0,0 +1,247 @@
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class WikiState:
+    def __init__(self, latency=0.0, bandwidth=0, error_rate=0.0, retry_after=0, seed=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.files = {}
+        self.stash = {}
+        self.sessions = set()
+        self.counters = {'requests': 0, 'uploads': 0, 'chunks': 0, 'errors': 0, 'bytes': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def injectError(self):
+        if self.error_rate <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+def normalize_name(name, upload=False):
+    if upload:
+        name = ''.join('-' if char in ':/\\' else char for char in name)
+    name = ' '.join(name.replace('_', ' ').split())
+    return name[:1].upper() + name[1:]
+
+def parse_multipart(body, content_type):
+    boundary = content_type.split('boundary=', 1)[1].strip().strip('"').encode('utf-8')
+    fields, files = {}, {}
+    for part in body.split(b'--' + boundary):
+        if b'\r\n\r\n' not in part:
+            continue
+        head, content = part.split(b'\r\n\r\n', 1)
+        if content.endswith(b'\r\n'):
+            content = content[:-2]
+        disposition = head.decode('utf-8', 'replace')
+        name = disposition.split('name="', 1)[1].split('"', 1)[0] if 'name="' in disposition else ''
+        if 'filename="' in disposition:
+            files[name] = content
+        else:
+            fields[name] = content.decode('utf-8')
+    return fields, files
+
+class WikiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def readBody(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = bytearray()
+        started = time.monotonic()
+        while len(body) < length:
+            block = self.rfile.read(min(64 * 1024, length - len(body)))
+            if not block:
+                break
+            body += block
+            if self.state.bandwidth:
+                ahead = len(body) / self.state.bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        self.state.count('bytes', len(body))
+        return bytes(body)
+
+    def params(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        files = {}
+        if self.command == 'POST':
+            body = self.readBody()
+            content_type = self.headers.get('Content-Type', '')
+            if content_type.startswith('multipart/form-data'):
+                fields, files = parse_multipart(body, content_type)
+                params.update(fields)
+            else:
+                params.update({k: v[0] for k, v in parse_qs(body.decode('utf-8')).items()})
+        return params, files
+
+    def session(self):
+        for part in self.headers.get('Cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == 'bench_session' and value in self.state.sessions:
+                return value
+        return None
+
+    def respond(self, data, cookie=None, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if cookie:
+            self.send_header('Set-Cookie', f"bench_session={cookie}; Path=/")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.handle_api()
+
+    def do_POST(self):
+        self.handle_api()
+
+    def handle_api(self):
+        if not urlparse(self.path).path.endswith('/api.php'):
+            self.send_error(404)
+            return
+        params, files = self.params()
+        self.state.count('requests')
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        action = params.get('action')
+        if action == 'query':
+            self.respond(self.query(params))
+        elif action == 'login':
+            session_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.sessions.add(session_id)
+            self.respond({'login': {'result': 'Success', 'lgusername': params.get('lgname', '')}}, cookie=session_id)
+        elif action == 'upload':
+            self.upload(params, files)
+        else:
+            self.respond({'error': {'code': 'badvalue', 'info': f"Unrecognized action {action}"}})
+
+    def query(self, params):
+        query = {}
+        meta = params.get('meta', '')
+        logged_in = self.session() is not None
+        if 'tokens' in meta:
+            query['tokens'] = {'logintoken': 'login+\\', 'csrftoken': 'csrf+\\' if logged_in else '+\\'}
+        if 'userinfo' in meta:
+            query['userinfo'] = {'id': 1, 'name': 'Benchmark'} if logged_in else {'id': 0, 'anon': ''}
+        if params.get('titles'):
+            pages = {}
+            normalized = []
+            for i, title in enumerate(params['titles'].split('|')):
+                name = normalize_name(title.split(':', 1)[-1])
+                if title != f"File:{name}":
+                    normalized.append({'from': title, 'to': f"File:{name}"})
+                info = self.state.files.get(name)
+                if info:
+                    pages[str(i + 1)] = {'title': f"File:{name}", 'imageinfo': [dict(info)]}
+                else:
+                    pages[str(-i - 1)] = {'title': f"File:{name}", 'missing': ''}
+            if normalized:
+                query['normalized'] = normalized
+            query['pages'] = pages
+        if params.get('list') == 'allimages':
+            sha1 = params.get('aisha1')
+            query['allimages'] = [{'name': name.replace(' ', '_'), 'title': f"File:{name}"} for name, info in self.state.files.items() if info['sha1'] == sha1][:1]
+        return {'query': query}
+
+    def upload(self, params, files):
+        if self.session() is None or params.get('token') != 'csrf+\\':
+            self.respond({'error': {'code': 'badtoken', 'info': 'Invalid CSRF token.'}})
+            return
+        if self.state.injectError():
+            self.state.count('errors')
+            self.respond({'error': {'code': 'maxlag', 'info': 'Waiting for a database server'}},
+                         headers={'Retry-After': str(self.state.retry_after)})
+            return
+
+        name = normalize_name(params.get('filename', ''), upload=True)
+        if params.get('stash'):
+            self.state.count('chunks')
+            chunk = files.get('chunk', b'')
+            offset = int(params.get('offset', 0))
+            file_size = int(params.get('filesize', 0))
+            with self.state.lock:
+                filekey = params.get('filekey') or uuid.uuid4().hex
+                stash = self.state.stash.setdefault(filekey, {'sha1': hashlib.sha1(), 'offset': 0})
+                matched = offset == stash['offset']
+                if matched:
+                    stash['sha1'].update(chunk)
+                    stash['offset'] += len(chunk)
+                done = stash['offset'] >= file_size
+            if not matched:
+                self.respond({'error': {'code': 'stashfailed', 'info': 'Chunk offset mismatch'}})
+            elif done:
+                self.respond({'upload': {'result': 'Success', 'filekey': filekey}})
+            else:
+                self.respond({'upload': {'result': 'Continue', 'filekey': filekey, 'offset': stash['offset']}})
+            return
+
+        self.state.count('uploads')
+        if params.get('filekey'):
+            with self.state.lock:
+                stash = self.state.stash.pop(params['filekey'], None)
+            if stash is None:
+                self.respond({'error': {'code': 'missingresult', 'info': 'Unknown file key'}})
+                return
+            info = {'sha1': stash['sha1'].hexdigest(), 'size': stash['offset']}
+        else:
+            data = files.get('file', b'')
+            info = {'sha1': hashlib.sha1(data).hexdigest(), 'size': len(data)}
+        with self.state.lock:
+            self.state.files[name] = info
+        self.respond({'upload': {'result': 'Success', 'filename': name.replace(' ', '_')}})
+
+def start_server(port=0, **options):
+    handler = type('Handler', (WikiHandler,), {'state': WikiState(**options)})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="שרת api.php מקומי לבדיקות ביצועים")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="השהיה לכל בקשה בשניות")
+    parser.add_argument('--bandwidth', type=float, default=0.0, help="רוחב פס לכל חיבור ב-MB/s (0 = ללא הגבלה)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="שיעור בקשות העלאה שייכשלו עם maxlag")
+    parser.add_argument('--retry-after', type=int, default=0)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    server = start_server(args.port, latency=args.latency, bandwidth=int(args.bandwidth * 1024 * 1024),
+                          error_rate=args.error_rate, retry_after=args.retry_after, seed=args.seed)
+    print(f"http://127.0.0.1:{server.server_port}", flush=True)
+    try:
+        for line in sys.stdin:
+            if line.strip() == 'stats':
+                with server.RequestHandlerClass.state.lock:
+                    print(json.dumps(server.RequestHandlerClass.state.counters), flush=True)
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
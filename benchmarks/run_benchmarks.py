@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from uploader_core import UploadEngine, HashCache, SessionManager, format_size, percentile
+from corpus import PROFILES, make_corpus
+
+class FakeWikiProcess:
+    def __init__(self, latency, bandwidth, error_rate, seed):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(BENCHMARK_DIR, 'fake_wiki.py'), '--latency', str(latency),
+             '--bandwidth', str(bandwidth), '--error-rate', str(error_rate), '--seed', str(seed)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        self.url = self.process.stdout.readline().strip()
+
+    def counters(self):
+        self.process.stdin.write('stats\n')
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait(timeout=10)
+
+def run_scenario(files, args, work_dir, trace_memory):
+    server = FakeWikiProcess(args.latency, args.bandwidth, args.error_rate, args.seed)
+    try:
+        engine = UploadEngine(
+            files, server.url, 'Benchmark', 'benchmark', '{{benchmark}}', 'benchmark', {},
+            concurrency=args.concurrency, chunk_size=args.chunk_size * 1024 * 1024,
+            chunk_threshold=args.chunk_threshold * 1024 * 1024, skip_duplicates=not args.no_skip_duplicates,
+            hash_cache=HashCache(os.path.join(work_dir, 'hashes.json')), session_manager=SessionManager(),
+            journal_path=os.path.join(work_dir, 'journal.jsonl')
+        )
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        records = engine.run()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        counters = server.counters()
+    finally:
+        server.close()
+        for name in ('hashes.json', 'journal.jsonl'):
+            if os.path.exists(os.path.join(work_dir, name)):
+                os.remove(os.path.join(work_dir, name))
+
+    total_bytes = sum(os.path.getsize(f) for f in files)
+    file_latencies = [r['total'] for r in engine.metrics.records if r['kind'] == 'file']
+    request_latencies = [r['total'] for r in engine.metrics.records if r['kind'] in ('upload', 'chunk', 'commit')]
+    return {
+        'files': len(files),
+        'bytes': total_bytes,
+        'elapsed': elapsed,
+        'throughput': total_bytes / elapsed,
+        'files_per_second': len(files) / elapsed,
+        'memory_peak': peak,
+        'file_p50': percentile(file_latencies, 0.5),
+        'file_p95': percentile(file_latencies, 0.95),
+        'request_p50': percentile(request_latencies, 0.5),
+        'request_p95': percentile(request_latencies, 0.95),
+        'failed': sum(1 for r in records if r['state'] == 'failed'),
+        'server': counters
+    }
+
+def summarize(runs):
+    median = sorted(runs, key=lambda run: run['throughput'])[len(runs) // 2]
+    summary = dict(median)
+    summary['runs'] = len(runs)
+    summary['throughput_spread'] = (max(r['throughput'] for r in runs) - min(r['throughput'] for r in runs)) / median['throughput']
+    peaks = [r['memory_peak'] for r in runs if r['memory_peak'] is not None]
+    summary['memory_peak'] = max(peaks) if peaks else None
+    return summary
+
+def format_result(name, result):
+    seconds = lambda value: f"{value:.3f}s" if value is not None else "-"
+    memory = format_size(result['memory_peak']) if result['memory_peak'] is not None else "-"
+    return (f"{name:<8} {result['files']:>5} קבצים  {format_size(result['throughput'])}/s  "
+            f"{result['files_per_second']:.1f} קבצים/s  זיכרון {memory}  "
+            f"קובץ p50 {seconds(result['file_p50'])} p95 {seconds(result['file_p95'])}  "
+            f"בקשה p50 {seconds(result['request_p50'])} p95 {seconds(result['request_p95'])}  "
+            f"נכשלו {result['failed']}")
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        if result['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: התפוקה ירדה מ-{format_size(previous['throughput'])}/s ל-{format_size(result['throughput'])}/s")
+        if result['memory_peak'] and previous.get('memory_peak') and result['memory_peak'] > previous['memory_peak'] * (1 + tolerance):
+            regressions.append(f"{name}: שיא הזיכרון עלה מ-{format_size(previous['memory_peak'])} ל-{format_size(result['memory_peak'])}")
+        if result['file_p95'] and previous.get('file_p95') and result['file_p95'] > previous['file_p95'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 לקובץ עלה מ-{previous['file_p95']:.3f}s ל-{result['file_p95']:.3f}s")
+    return regressions
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="בדיקות ביצועים למנוע ההעלאה מול שרת api.php מקומי")
+    parser.add_argument('scenarios', nargs='*', default=['small', 'mixed'],
+                        help=f"תרחישים להרצה: {', '.join(sorted(PROFILES))}")
+    parser.add_argument('--scale', type=float, default=1.0, help="הכפלת מספר הקבצים בכל תרחיש")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.02, help="השהיית השרת לכל בקשה בשניות")
+    parser.add_argument('--bandwidth', type=float, default=0.0, help="רוחב פס לכל חיבור ב-MB/s (0 = ללא הגבלה)")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=5, help="גודל מקטע ב-MB")
+    parser.add_argument('--chunk-threshold', type=int, default=20, help="העלאה במקטעים לקבצים מעל גודל זה ב-MB")
+    parser.add_argument('--no-skip-duplicates', action='store_true')
+    parser.add_argument('--no-memory', action='store_true', help="ללא מדידת זיכרון (tracemalloc מאט את ההרצה)")
+    parser.add_argument('--corpus-dir', help="תיקייה לשמירת הקבצים הסינתטיים בין הרצות")
+    parser.add_argument('--json', help="שמירת התוצאות לקובץ JSON")
+    parser.add_argument('--baseline', help="קובץ JSON מהרצה קודמת להשוואה")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="נסיגה מותרת יחסית לקו הבסיס")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in PROFILES]
+    if unknown:
+        parser.error(f"תרחיש לא מוכר: {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix='hamichlol_benchmark_')
+    corpus_root = args.corpus_dir or os.path.join(work_dir, 'corpus')
+    results = {}
+    try:
+        for name in args.scenarios:
+            corpus_dir = os.path.join(corpus_root, f"{name}_{args.scale}_{args.seed}")
+            if os.path.isdir(corpus_dir):
+                files = sorted(os.path.join(corpus_dir, f) for f in os.listdir(corpus_dir))
+            else:
+                files = make_corpus(corpus_dir, name, args.scale, args.seed)
+            runs = [run_scenario(files, args, work_dir, not args.no_memory) for _ in range(max(1, args.repeat))]
+            results[name] = summarize(runs)
+            print(format_result(name, results[name]), flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = {
+        'python': sys.version.split()[0],
+        'options': {k: v for k, v in vars(args).items() if k not in ('json', 'baseline', 'corpus_dir')},
+        'scenarios': results
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"נסיגה בביצועים: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if any(result['failed'] for result in results.values()) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(os.path.dirname(BENCHMARK_DIR), 'code.py')
+
+IMPORT_SCRIPT = (
+    "import sys, time\n"
+    "sys.path.insert(0, {root!r})\n"
+    "started = time.perf_counter()\n"
+    "import code\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def measure_launch(command, work_dir):
+    env = dict(os.environ, HAMICHLOL_STARTUP_BENCHMARK='1')
+    started = time.perf_counter()
+    subprocess.run(command, cwd=work_dir, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+def measure_import(work_dir):
+    script = IMPORT_SCRIPT.format(root=os.path.dirname(APP_PATH))
+    output = subprocess.run([sys.executable, '-c', script], cwd=work_dir, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="מדידת זמן הפתיחה של הממשק, מהפעלת התהליך ועד הצגת החלון")
+    parser.add_argument('--exe', help="נתיב לקובץ הפעלה שנבנה (ברירת מחדל: code.py עם המפרש הנוכחי)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.0, help="זמן פתיחה מרבי בשניות (חציון)")
+    parser.add_argument('--json', help="שמירת התוצאות לקובץ JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    command = [os.path.abspath(args.exe)] if args.exe else [sys.executable, APP_PATH]
+    work_dir = tempfile.mkdtemp(prefix='hamichlol_startup_')
+
+    measure_launch(command, work_dir)
+    launches = [measure_launch(command, work_dir) for _ in range(max(1, args.repeat))]
+    imports = [measure_import(work_dir) for _ in range(max(1, args.repeat))] if not args.exe else []
+
+    result = {
+        'command': command,
+        'launch_median': median(launches),
+        'launch_min': min(launches),
+        'launch_max': max(launches),
+        'import_median': median(imports) if imports else None,
+        'runs': len(launches)
+    }
+    print(f"פתיחה עד הצגת החלון: חציון {result['launch_median']:.3f}s"
+          f" (מינימום {result['launch_min']:.3f}s, מקסימום {result['launch_max']:.3f}s)")
+    if imports:
+        print(f"ייבוא code.py: חציון {result['import_median']:.3f}s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if result['launch_median'] > args.budget:
+        print(f"זמן הפתיחה חורג מהתקציב של {args.budget:.2f}s", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
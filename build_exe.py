@@ -9,13 +9,30 @@ if not os.path.exists(logo_path):
     print("Error: logo.png not found in Downloads folder")
     sys.exit(1)
 
+onefile = '--onefile' in sys.argv[1:]
+
+excluded_modules = [
+    'tkinter',
+    'PyQt5.QtWebEngineWidgets',
+    'PyQt5.QtWebEngineCore',
+    'PyQt5.QtQml',
+    'PyQt5.QtQuick',
+    'PyQt5.QtSql',
+    'PyQt5.QtMultimedia',
+    'PyQt5.QtNetwork',
+    'PyQt5.QtBluetooth',
+    'PyQt5.QtDesigner',
+]
+
 PyInstaller.__main__.run([
     'code.py',
     '--name=HamichlolUploader',
-    '--onefile',
+    '--onefile' if onefile else '--onedir',
     '--windowed',
     '--icon=' + logo_path,
     '--add-data=' + f'{logo_path};.',
     '--noconsole',
+    '--noupx',
     '--clean',
-])
\ No newline at end of file
+    '--noconfirm',
+] + [f'--exclude-module={module}' for module in excluded_modules])
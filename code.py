@@ -1,118 +1,274 @@
 import sys 
 import os
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QLabel, QFileDialog, 
                             QLineEdit, QTextEdit, QVBoxLayout, QHBoxLayout, QWidget, 
-                            QListWidget, QMessageBox, QCheckBox, QProgressBar, QComboBox,
-                            QScrollArea)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings, QSize
-from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPixmap
+                            QListView, QMessageBox, QCheckBox, QProgressBar, QComboBox,
+                            QScrollArea, QSpinBox, QInputDialog, QMenu, QAbstractItemView)
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QSettings, QSize, QObject, QRunnable, QThreadPool,
+                          QAbstractListModel, QModelIndex, QTimer)
+from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPixmap, QImage, QImageReader
 
-import requests
-import json
-import configparser
-import base64
+import time
+from collections import OrderedDict
+
+from upload_state import HashCache, SettingsStore, UploadQueue
+from upload_templates import FileTemplates, load_csv, FILE_FIELDS, EXIF_FIELDS
 
 class UploadThread(QThread):
     progress_signal = pyqtSignal(int)
     status_signal = pyqtSignal(str)
+    file_status_signal = pyqtSignal(str, str)
+    stats_signal = pyqtSignal(dict)
     finished_signal = pyqtSignal(list)
     
-    def __init__(self, files, site, username, password, description, summary, target_filenames):
+    def __init__(self, files, site, username, password, description, summary, target_filenames, extra_targets=None,
+                 **options):
         QThread.__init__(self)
-        self.files = files
-        self.site = site
-        self.username = username
-        self.password = password
-        self.description = description
-        self.summary = summary
-        self.target_filenames = target_filenames
-        self.results = []
-        self.session = requests.Session()
+        from uploader_core import UploadEngine, FanOutEngine
+        options.update(
+            progress_callback=self.progress_signal.emit, status_callback=self.status_signal.emit,
+            file_callback=self.fileStatus, stats_callback=self.stats_signal.emit
+        )
+        if extra_targets:
+            targets = [{'site': site, 'username': username, 'password': password}] + extra_targets
+            self.engine = FanOutEngine(files, targets, description, summary, target_filenames, **options)
+        else:
+            self.engine = UploadEngine(files, site, username, password, description, summary, target_filenames, **options)
+
+    def fileStatus(self, index, state):
+        self.file_status_signal.emit(self.engine.files[index], state)
 
     def run(self):
+        self.metrics_lines = []
         try:
-            self.status_signal.emit("מתחבר למכלול...")
-            
-            api_url = f"https://{self.site}/w/api.php"
-            
-            login_token_params = {
-                'action': 'query',
-                'meta': 'tokens',
-                'type': 'login',
-                'format': 'json'
-            }
-            r = self.session.get(api_url, params=login_token_params)
-            login_token = r.json()['query']['tokens']['logintoken']
-            
-            login_params = {
-                'action': 'login',
-                'lgname': self.username,
-                'lgpassword': self.password,
-                'lgtoken': login_token,
-                'format': 'json'
-            }
-            r = self.session.post(api_url, data=login_params)
-            login_result = r.json()
-            
-            if login_result.get('login', {}).get('result') != 'Success':
-                raise Exception(f"התחברות נכשלה: {json.dumps(login_result)}")
-            
-            self.status_signal.emit("התחברות למכלול הצליחה")
-            
-            csrf_params = {
-                'action': 'query',
-                'meta': 'tokens',
-                'format': 'json'
-            }
-            r = self.session.get(api_url, params=csrf_params)
-            csrf_token = r.json()['query']['tokens']['csrftoken']
-            
-            total_files = len(self.files)
-            
-            for i, file_path in enumerate(self.files):
-                try:
-                    filename = os.path.basename(file_path)
-                    target_name = self.target_filenames.get(file_path, filename)
-                    
-                    self.status_signal.emit(f"מעלה קובץ {i+1}/{total_files}: {filename}")
-                    
-                    with open(file_path, 'rb') as f:
-                        file_contents = f.read()
-                    
-                    upload_params = {
-                        'action': 'upload',
-                        'filename': target_name,
-                        'comment': self.summary,
-                        'text': self.description,
-                        'token': csrf_token,
-                        'ignorewarnings': 1,
-                        'format': 'json'
-                    }
-                    
-                    files = {'file': (target_name, file_contents)}
-                    
-                    r = self.session.post(api_url, data=upload_params, files=files)
-                    result = r.json()
-                    
-                    if 'upload' in result and result['upload']['result'] == 'Success':
-                        self.results.append(f"הקובץ {target_name} הועלה בהצלחה")
-                    else:
-                        error_msg = result.get('error', {}).get('info', json.dumps(result))
-                        self.results.append(f"שגיאה בהעלאת {target_name}: {error_msg}")
-                
-                except Exception as e:
-                    self.results.append(f"שגיאה בהעלאת {filename}: {str(e)}")
-                
-                progress = int(((i + 1) / total_files) * 100)
-                self.progress_signal.emit(progress)
-            
-            self.status_signal.emit("העלאה הסתיימה")
-            self.finished_signal.emit(self.results)
-            
+            records = self.engine.run()
+            self.metrics_lines = self.engine.metrics.summaryLines()
+            self.finished_signal.emit([record['message'] for record in records])
         except Exception as e:
             self.status_signal.emit(f"שגיאה: {str(e)}")
             self.finished_signal.emit([f"שגיאה כללית: {str(e)}"])
 
+class TitleCheckThread(QThread):
+    status_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(dict)
+    
+    def __init__(self, site, target_names):
+        QThread.__init__(self)
+        self.site = site
+        self.target_names = target_names
+
+    def run(self):
+        try:
+            import requests
+            from uploader_core import check_titles, api_url
+            session = requests.Session()
+            statuses = check_titles(session, api_url(self.site), list(self.target_names.values()))
+            self.finished_signal.emit({path: dict(statuses[name], name=name) for path, name in self.target_names.items()})
+        except Exception as e:
+            self.status_signal.emit(f"בדיקת שמות היעד נכשלה: {str(e)}")
+            self.finished_signal.emit({})
+
+class FolderScanThread(QThread):
+    files_signal = pyqtSignal(list)
+    finished_signal = pyqtSignal(int)
+    
+    def __init__(self, paths, batch_size=500, batch_interval=0.2):
+        QThread.__init__(self)
+        self.paths = paths
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+
+    def run(self):
+        batch = []
+        found = 0
+        last_flush = time.monotonic()
+        from uploader_core import scan_paths
+        for path in scan_paths(self.paths, should_stop=self.isInterruptionRequested):
+            batch.append(path)
+            found += 1
+            if len(batch) >= self.batch_size or time.monotonic() - last_flush >= self.batch_interval:
+                self.files_signal.emit(batch)
+                batch = []
+                last_flush = time.monotonic()
+        if batch:
+            self.files_signal.emit(batch)
+        self.finished_signal.emit(found)
+
+class TemplateRenderThread(QThread):
+    finished_signal = pyqtSignal(dict, dict, dict)
+    
+    def __init__(self, templates, files, rows, count):
+        QThread.__init__(self)
+        self.templates = templates
+        self.files = files
+        self.rows = rows
+        self.count = count
+
+    def run(self):
+        names = {}
+        descriptions = {}
+        unresolved = {}
+        for file_path in self.files:
+            if self.isInterruptionRequested():
+                break
+            names[file_path], descriptions[file_path], missing = self.templates.checkFile(
+                file_path, self.rows.get(file_path, 0), self.count)
+            if missing:
+                unresolved[file_path] = missing
+        self.finished_signal.emit(names, descriptions, unresolved)
+
+class ThumbnailSignals(QObject):
+    loaded = pyqtSignal(str, QImage)
+
+class ThumbnailTask(QRunnable):
+    def __init__(self, path, size, signals):
+        QRunnable.__init__(self)
+        self.path = path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        reader = QImageReader(self.path)
+        image = QImage()
+        if reader.canRead():
+            source_size = reader.size()
+            if source_size.isValid():
+                reader.setScaledSize(source_size.scaled(self.size, self.size, Qt.KeepAspectRatio))
+            image = reader.read()
+        self.signals.loaded.emit(self.path, image)
+
+class FileListModel(QAbstractListModel):
+    THUMBNAIL_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg')
+    STATUS_COLORS = {
+        'queued': '#333366',
+        'paused': '#b26a00',
+        'cancelled': '#888888',
+        'uploading': '#3060d0',
+        'uploaded': '#2e7d32',
+        'skipped': '#888888',
+        'failed': '#c62828'
+    }
+    STATUS_MARKS = {
+        'queued': '•',
+        'paused': '⏸',
+        'cancelled': '⊘',
+        'uploading': '⏳',
+        'uploaded': '✓',
+        'skipped': '↷',
+        'failed': '✗'
+    }
+    
+    def __init__(self, label_provider, thumbnail_size=48, cache_size=500):
+        QAbstractListModel.__init__(self)
+        self.files = []
+        self.statuses = {}
+        self.labels = {}
+        self.label_provider = label_provider
+        self.thumbnail_size = thumbnail_size
+        self.cache_size = cache_size
+        self.thumbnails = OrderedDict()
+        self.pending = set()
+        self.rows = {}
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(2)
+        self.thumbnail_signals = ThumbnailSignals()
+        self.thumbnail_signals.loaded.connect(self.thumbnailLoaded)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.files):
+            return None
+        row = index.row()
+        path = self.files[row]
+        
+        if role == Qt.DisplayRole:
+            if row not in self.labels:
+                self.labels[row] = self.label_provider(path)
+            mark = self.STATUS_MARKS.get(self.statuses.get(row))
+            return f"{mark} {self.labels[row]}" if mark else self.labels[row]
+        if role == Qt.DecorationRole:
+            return self.thumbnail(path)
+        if role == Qt.ToolTipRole:
+            return path
+        if role == Qt.ForegroundRole and row in self.statuses:
+            return QColor(self.STATUS_COLORS[self.statuses[row]])
+        return None
+
+    def thumbnail(self, path):
+        if path in self.thumbnails:
+            self.thumbnails.move_to_end(path)
+            return self.thumbnails[path]
+        if path not in self.pending and path.lower().endswith(self.THUMBNAIL_EXTENSIONS):
+            self.pending.add(path)
+            self.thread_pool.start(ThumbnailTask(path, self.thumbnail_size, self.thumbnail_signals))
+        return None
+
+    def thumbnailLoaded(self, path, image):
+        self.pending.discard(path)
+        self.thumbnails[path] = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        while len(self.thumbnails) > self.cache_size:
+            self.thumbnails.popitem(last=False)
+        row = self.rows.get(path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def appendFiles(self, files):
+        if not files:
+            return
+        start = len(self.files)
+        self.beginInsertRows(QModelIndex(), start, start + len(files) - 1)
+        for row, path in enumerate(files, start):
+            self.files.append(path)
+            self.rows[path] = row
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.files.clear()
+        self.statuses.clear()
+        self.labels.clear()
+        self.rows.clear()
+        self.endResetModel()
+
+    def removeFiles(self, files):
+        removed = set(files)
+        statuses = {self.files[row]: status for row, status in self.statuses.items()}
+        self.beginResetModel()
+        self.files[:] = [path for path in self.files if path not in removed]
+        self.rows.clear()
+        self.rows.update((path, row) for row, path in enumerate(self.files))
+        self.statuses = {self.rows[path]: status for path, status in statuses.items() if path in self.rows}
+        self.labels.clear()
+        self.endResetModel()
+
+    def setStatus(self, row, status):
+        if 0 <= row < len(self.files):
+            self.statuses[row] = status
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.ForegroundRole])
+
+    def setStatuses(self, statuses):
+        self.statuses.update(statuses)
+        self.refresh()
+
+    def clearStatuses(self):
+        self.statuses.clear()
+        self.refresh()
+
+    def refresh(self, row=None):
+        if row is None:
+            self.labels.clear()
+            if self.files:
+                self.dataChanged.emit(self.index(0), self.index(len(self.files) - 1), [Qt.DisplayRole])
+        else:
+            self.labels.pop(row, None)
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
 class HamichlolUploader(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -120,15 +276,41 @@ class HamichlolUploader(QMainWindow):
         self.default_site = "www.hamichlol.org.il"
         self.default_username = ""
         self.default_password = ""
+        self.default_extra_targets = ""
         self.default_description = "{{יצירה נגזרת|מרוטש=כן}}"
         self.default_summary = "העלאת תמונה מרוטשת"
+        self.default_concurrency = 4
+        self.default_chunk_size = 5
+        self.default_chunk_threshold = 20
+        self.default_skip_duplicates = True
+        self.default_remember_login = False
+        self.default_optimize_images = False
+        self.default_save_metrics = False
+        self.default_verify_uploads = False
+        self.default_small_files_first = False
+        self.default_max_dimension = 0
+        self.default_name_template = ""
         
-        self.selected_files = []
+        self.file_model = FileListModel(self.fileLabel)
+        self.selected_files = self.file_model.files
         self.target_filenames = {}
+        self.hash_cache = None
+        self.title_statuses = {}
+        self.title_check_thread = None
+        self.title_check_pending = False
+        self.scan_threads = []
+        self.render_threads = []
+        self.template_issues = {}
+        self.csv_rows = {}
+        self.session_manager = None
+        self.settings_store = SettingsStore()
+        self.upload_queue = UploadQueue()
+        self.upload_thread = None
         
         self.settings = QSettings('HamichlolUploader', 'WindowState')
         self.initUI()
         self.loadSettings()
+        self.restoreQueue()
         
         size = self.settings.value('window_size', QSize(800, 600))
         self.resize(size)
@@ -146,6 +328,7 @@ class HamichlolUploader(QMainWindow):
         if os.path.exists(logo_path):
             self.setWindowIcon(QIcon(logo_path))
         self.setMinimumSize(600, 400)
+        self.setAcceptDrops(True)
         
         self.scroll = QScrollArea()
         self.scroll.setWidgetResizable(True)
@@ -208,6 +391,22 @@ class HamichlolUploader(QMainWindow):
         title_widget.setLayout(title_layout)
         main_layout.addWidget(title_widget)
         
+        profile_layout = QHBoxLayout()
+        profile_label = QLabel("פרופיל העלאה:")
+        self.profile_combo = QComboBox()
+        self.profile_combo.setMinimumWidth(200)
+        self.profile_combo.activated.connect(self.applyProfile)
+        self.save_profile_btn = QPushButton("שמור כפרופיל")
+        self.save_profile_btn.clicked.connect(self.saveProfile)
+        self.delete_profile_btn = QPushButton("מחק פרופיל")
+        self.delete_profile_btn.clicked.connect(self.deleteProfile)
+        profile_layout.addWidget(profile_label)
+        profile_layout.addWidget(self.profile_combo)
+        profile_layout.addWidget(self.save_profile_btn)
+        profile_layout.addWidget(self.delete_profile_btn)
+        profile_layout.addStretch()
+        main_layout.addLayout(profile_layout)
+        
         connection_group = QWidget()
         connection_group.setStyleSheet("background-color: rgba(255, 255, 255, 0.5); border-radius: 10px; padding: 10px;")
         connection_layout = QHBoxLayout(connection_group)
@@ -238,6 +437,17 @@ class HamichlolUploader(QMainWindow):
         connection_layout.addLayout(password_layout)
         
         main_layout.addWidget(connection_group)
+        
+        targets_layout = QHBoxLayout()
+        targets_label = QLabel("יעדים נוספים:")
+        self.extra_targets_input = QTextEdit()
+        self.extra_targets_input.setAcceptRichText(False)
+        self.extra_targets_input.setPlainText(self.default_extra_targets)
+        self.extra_targets_input.setPlaceholderText("שורה לכל אתר נוסף: אתר|שם משתמש|סיסמה (שם המשתמש והסיסמה אופציונליים)")
+        self.extra_targets_input.setMaximumHeight(60)
+        targets_layout.addWidget(targets_label)
+        targets_layout.addWidget(self.extra_targets_input)
+        main_layout.addLayout(targets_layout)
 
         file_group = QWidget()
         file_group.setStyleSheet("background-color: rgba(255, 255, 255, 0.5); border-radius: 10px; padding: 10px;")
@@ -276,7 +486,38 @@ class HamichlolUploader(QMainWindow):
             }
         """)
         
+        self.select_folder_btn = QPushButton("בחר תיקייה")
+        self.select_folder_btn.clicked.connect(self.selectFolder)
+        self.select_folder_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #4a7eff;
+                color: white;
+                border-radius: 6px;
+                padding: 12px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #3060d0;
+            }
+        """)
+        
+        self.check_names_btn = QPushButton("בדוק שמות יעד")
+        self.check_names_btn.clicked.connect(self.checkTargetNames)
+        self.check_names_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #8a6cff;
+                color: white;
+                border-radius: 6px;
+                padding: 12px;
+            }
+            QPushButton:hover {
+                background-color: #6f50e0;
+            }
+        """)
+        
         button_layout.addWidget(self.select_files_btn)
+        button_layout.addWidget(self.select_folder_btn)
+        button_layout.addWidget(self.check_names_btn)
         button_layout.addWidget(self.clear_files_btn)
         file_layout.addLayout(button_layout)
         
@@ -288,26 +529,32 @@ class HamichlolUploader(QMainWindow):
         file_name_layout.addWidget(self.target_name_input)
         file_layout.addLayout(file_name_layout)
         
-        self.file_list = QListWidget()
+        self.file_list = QListView()
+        self.file_list.setModel(self.file_model)
+        self.file_list.setUniformItemSizes(True)
+        self.file_list.setIconSize(QSize(self.file_model.thumbnail_size, self.file_model.thumbnail_size))
         self.file_list.setAlternatingRowColors(True)
-        self.file_list.currentItemChanged.connect(self.fileSelectionChanged)
+        self.file_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.file_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.file_list.customContextMenuRequested.connect(self.showQueueMenu)
+        self.file_list.selectionModel().currentChanged.connect(self.fileSelectionChanged)
         self.file_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 border: 2px solid #aabbcc;
                 border-radius: 8px;
                 background-color: rgba(245, 248, 255, 0.8);
                 padding: 5px;
                 font-size: 13px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 6px;
                 border-bottom: 1px solid #e8f0ff;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #4a7eff;
                 color: white;
             }
-            QListWidget::item:alternate {
+            QListView::item:alternate {
                 background-color: #eef5ff;
             }
         """)
@@ -337,6 +584,94 @@ class HamichlolUploader(QMainWindow):
         summary_layout.addWidget(self.summary_input)
         upload_layout.addLayout(summary_layout)
         
+        template_layout = QHBoxLayout()
+        name_template_label = QLabel("תבנית שם:")
+        self.name_template_input = QLineEdit(self.default_name_template)
+        self.name_template_input.setPlaceholderText("{stem}_{index:03d}")
+        self.name_template_input.setToolTip(
+            "שדות זמינים בשם ובתיאור: " + ", ".join("{" + field + "}" for field in FILE_FIELDS + EXIF_FIELDS)
+            + "\nוכן כל עמודה מקובץ ה-CSV"
+        )
+        self.name_template_input.textChanged.connect(self.updatePreview)
+        self.description_input.textChanged.connect(self.updatePreview)
+        
+        self.csv_btn = QPushButton("טען CSV")
+        self.csv_btn.clicked.connect(self.selectCsv)
+        self.apply_template_btn = QPushButton("החל על שמות היעד")
+        self.apply_template_btn.clicked.connect(self.applyNameTemplate)
+        
+        template_layout.addWidget(name_template_label)
+        template_layout.addWidget(self.name_template_input)
+        template_layout.addWidget(self.csv_btn)
+        template_layout.addWidget(self.apply_template_btn)
+        upload_layout.addLayout(template_layout)
+        
+        self.preview_label = QLabel()
+        self.preview_label.setWordWrap(True)
+        self.preview_label.setStyleSheet("font-size: 12px; color: #555577;")
+        upload_layout.addWidget(self.preview_label)
+        
+        concurrency_layout = QHBoxLayout()
+        concurrency_label = QLabel("העלאות במקביל:")
+        self.concurrency_input = QSpinBox()
+        self.concurrency_input.setRange(1, 16)
+        self.concurrency_input.setValue(self.default_concurrency)
+        
+        chunk_threshold_label = QLabel("העלאה במקטעים מעל (MB):")
+        self.chunk_threshold_input = QSpinBox()
+        self.chunk_threshold_input.setRange(1, 1024)
+        self.chunk_threshold_input.setValue(self.default_chunk_threshold)
+        
+        chunk_size_label = QLabel("גודל מקטע (MB):")
+        self.chunk_size_input = QSpinBox()
+        self.chunk_size_input.setRange(1, 100)
+        self.chunk_size_input.setValue(self.default_chunk_size)
+        
+        concurrency_layout.addWidget(concurrency_label)
+        concurrency_layout.addWidget(self.concurrency_input)
+        concurrency_layout.addWidget(chunk_threshold_label)
+        concurrency_layout.addWidget(self.chunk_threshold_input)
+        concurrency_layout.addWidget(chunk_size_label)
+        concurrency_layout.addWidget(self.chunk_size_input)
+        concurrency_layout.addStretch()
+        upload_layout.addLayout(concurrency_layout)
+        
+        self.skip_duplicates_checkbox = QCheckBox("דלג על קבצים שכבר קיימים במכלול")
+        self.skip_duplicates_checkbox.setChecked(self.default_skip_duplicates)
+        upload_layout.addWidget(self.skip_duplicates_checkbox)
+        
+        self.remember_login_checkbox = QCheckBox("זכור את ההתחברות בין הפעלות")
+        self.remember_login_checkbox.setChecked(self.default_remember_login)
+        upload_layout.addWidget(self.remember_login_checkbox)
+        
+        self.save_metrics_checkbox = QCheckBox("שמור מדדי ביצועים לכל העלאה (hamichlol_uploader_metrics.jsonl)")
+        self.save_metrics_checkbox.setChecked(self.default_save_metrics)
+        upload_layout.addWidget(self.save_metrics_checkbox)
+        
+        self.verify_uploads_checkbox = QCheckBox("אמת קבצים לאחר ההעלאה והעלה מחדש קבצים פגומים")
+        self.verify_uploads_checkbox.setChecked(self.default_verify_uploads)
+        upload_layout.addWidget(self.verify_uploads_checkbox)
+        
+        self.small_files_first_checkbox = QCheckBox("העלה קבצים קטנים קודם")
+        self.small_files_first_checkbox.setChecked(self.default_small_files_first)
+        self.small_files_first_checkbox.toggled.connect(self.upload_queue.setSmallFirst)
+        upload_layout.addWidget(self.small_files_first_checkbox)
+        
+        optimize_layout = QHBoxLayout()
+        self.optimize_images_checkbox = QCheckBox("בצע אופטימיזציה לתמונות לפני ההעלאה")
+        self.optimize_images_checkbox.setChecked(self.default_optimize_images)
+        max_dimension_label = QLabel("הקטנה לממד מרבי (פיקסלים, 0 = ללא):")
+        self.max_dimension_input = QSpinBox()
+        self.max_dimension_input.setRange(0, 20000)
+        self.max_dimension_input.setSingleStep(100)
+        self.max_dimension_input.setValue(self.default_max_dimension)
+        
+        optimize_layout.addWidget(self.optimize_images_checkbox)
+        optimize_layout.addWidget(max_dimension_label)
+        optimize_layout.addWidget(self.max_dimension_input)
+        optimize_layout.addStretch()
+        upload_layout.addLayout(optimize_layout)
+        
         main_layout.addWidget(upload_options)
         
         progress_container = QWidget()
@@ -367,7 +702,12 @@ class HamichlolUploader(QMainWindow):
         self.status_label.setAlignment(Qt.AlignCenter)
         self.status_label.setStyleSheet("font-size: 14px; color: #333366; margin-top: 5px;")
         
+        self.transfer_label = QLabel()
+        self.transfer_label.setAlignment(Qt.AlignCenter)
+        self.transfer_label.setStyleSheet("font-size: 12px; color: #555577;")
+        
         progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.transfer_label)
         progress_layout.addWidget(self.status_label)
         main_layout.addWidget(progress_container)
         
@@ -402,17 +742,21 @@ class HamichlolUploader(QMainWindow):
         self.setLayoutDirection(Qt.RightToLeft)
         
     def fileSelectionChanged(self, current, previous):
-        if current:
-            file_path = self.selected_files[self.file_list.currentRow()]
+        if current.isValid():
+            file_path = self.selected_files[current.row()]
             self.target_name_input.setText(self.target_filenames.get(file_path, os.path.basename(file_path)))
+            self.updatePreview()
             
     def updateTargetFilename(self, new_name):
-        if self.file_list.currentItem():
-            current_file = self.selected_files[self.file_list.currentRow()]
+        current = self.file_list.currentIndex()
+        if current.isValid():
+            current_file = self.selected_files[current.row()]
             if new_name:
                 self.target_filenames[current_file] = new_name
             else:
                 self.target_filenames.pop(current_file, None)
+            if self.title_statuses.pop(current_file, None) is not None:
+                self.file_model.refresh(current.row())
     
     def selectFiles(self):
         downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
@@ -425,49 +769,357 @@ class HamichlolUploader(QMainWindow):
         )
         
         if files:
-            self.selected_files.extend(files)
-            self.updateFileList()
+            self.addFiles(files)
+            self.checkTargetNames()
     
-    def updateFileList(self):
-        self.file_list.clear()
-        for file in self.selected_files:
-            self.file_list.addItem(os.path.basename(file))
+    def selectFolder(self):
+        downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
         
+        folder = QFileDialog.getExistingDirectory(self, "בחר תיקייה להעלאה", downloads_path)
+        if folder:
+            self.scanPaths([folder])
+    
+    def scanPaths(self, paths):
+        scan_thread = FolderScanThread(paths)
+        scan_thread.files_signal.connect(lambda files: self.scannedFiles(scan_thread, files))
+        scan_thread.finished_signal.connect(lambda found: self.scanFinished(scan_thread, found))
+        self.scan_threads.append(scan_thread)
+        self.updateStatus("סורק קבצים...")
+        scan_thread.start()
+    
+    def scannedFiles(self, scan_thread, files):
+        if not scan_thread.isInterruptionRequested():
+            self.addFiles(files)
+    
+    def scanFinished(self, scan_thread, found):
+        if scan_thread in self.scan_threads:
+            self.scan_threads.remove(scan_thread)
+        if scan_thread.isInterruptionRequested():
+            return
+        self.updateStatus(f"הסריקה הסתיימה: נמצאו {found} קבצים, ברשימה {len(self.selected_files)} קבצים")
+        if not self.scan_threads:
+            self.checkTargetNames()
+    
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+    
+    def dropEvent(self, event):
+        paths = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        if paths:
+            event.acceptProposedAction()
+            self.scanPaths(paths)
+    
+    def hashCache(self):
+        if self.hash_cache is None:
+            self.hash_cache = HashCache()
+        return self.hash_cache
+    
+    def fileLabel(self, file):
+        notes = []
+        uploaded = self.hashCache().uploaded(file, self.site_input.text())
+        if uploaded:
+            notes.append(f"כבר הועלה בשם {uploaded['target']}")
+        
+        missing = self.template_issues.get(file)
+        if missing:
+            notes.append(f"שדות תבנית ללא ערך: {', '.join(missing)}")
+        
+        status = self.title_statuses.get(file)
+        if status:
+            if status['state'] == 'invalid':
+                notes.append(f"שם לא חוקי: {status['reason']}")
+            elif status['state'] == 'exists':
+                notes.append("קיים כבר קובץ בשם זה")
+            if status.get('normalized'):
+                notes.append(f"יישמר בשם {status['normalized']}")
+            if status.get('duplicate'):
+                notes.append("שם היעד חוזר ברשימה")
+        
+        if notes:
+            return f"{os.path.basename(file)} ({', '.join(notes)})"
+        return os.path.basename(file)
+    
+    def fileTemplates(self):
+        return FileTemplates(self.name_template_input.text(), self.description_input.toPlainText(), self.csv_rows)
+    
+    def selectCsv(self):
+        csv_path, _ = QFileDialog.getOpenFileName(self, "בחר קובץ CSV", "", "קבצי CSV (*.csv);;כל הקבצים (*.*)")
+        if not csv_path:
+            return
+        try:
+            self.csv_rows = load_csv(csv_path)
+        except Exception as e:
+            QMessageBox.warning(self, "שגיאה", f"שגיאה בטעינת קובץ ה-CSV: {str(e)}")
+            return
+        self.csv_btn.setText(f"CSV: {os.path.basename(csv_path)} ({len(self.csv_rows)})")
+        self.updatePreview()
+    
+    def updatePreview(self):
+        if not self.selected_files:
+            self.preview_label.clear()
+            return
+        current = self.file_list.currentIndex()
+        row = current.row() if current.isValid() else 0
+        file_path = self.selected_files[row]
+        name, description, missing = self.fileTemplates().checkFile(file_path, row, len(self.selected_files))
+        if not self.name_template_input.text():
+            name = self.target_filenames.get(file_path, name)
+        if len(description) > 300:
+            description = description[:300] + "..."
+        preview = f"תצוגה מקדימה: {name}\n{description}"
+        if missing:
+            preview += f"\nשדות ללא ערך: {', '.join(missing)}"
+        self.preview_label.setText(preview)
+    
+    def applyNameTemplate(self):
+        if not self.name_template_input.text():
+            QMessageBox.warning(self, "שגיאה", "אנא הזן תבנית שם")
+            return
+        if not self.selected_files:
+            return
+        self.renderTemplates(list(self.selected_files), self.nameTemplateApplied)
+    
+    def nameTemplateApplied(self, names, descriptions):
+        self.target_filenames.update(names)
+        self.title_statuses = {}
+        self.updateFileList()
+        current = self.file_list.currentIndex()
+        if current.isValid():
+            self.target_name_input.setText(self.target_filenames[self.selected_files[current.row()]])
+        self.checkTargetNames()
+    
+    def renderTemplates(self, files, callback):
+        rows = self.file_model.rows
+        render_thread = TemplateRenderThread(self.fileTemplates(), files, {file: rows.get(file, 0) for file in files},
+                                             len(self.selected_files))
+        render_thread.finished_signal.connect(
+            lambda names, descriptions, missing: self.templatesRendered(render_thread, callback, names, descriptions, missing))
+        self.render_threads.append(render_thread)
+        self.updateStatus("מחיל את התבניות על הקבצים...")
+        render_thread.start()
+    
+    def templatesRendered(self, render_thread, callback, names, descriptions, missing):
+        if render_thread in self.render_threads:
+            self.render_threads.remove(render_thread)
+        if render_thread.isInterruptionRequested():
+            return
+        for file in names:
+            self.template_issues.pop(file, None)
+        self.template_issues.update(missing)
+        if missing:
+            self.file_model.refresh()
+            self.updateStatus(f"ב-{len(missing)} קבצים נותרו שדות תבנית ללא ערך")
+        else:
+            self.updateStatus(f"התבניות הוחלו על {len(names)} קבצים")
+        callback(names, descriptions)
+    
+    def addFiles(self, files):
+        had_files = bool(self.selected_files)
+        rows = self.file_model.rows
+        files = [file for file in dict.fromkeys(os.path.normpath(f) for f in files) if file not in rows]
+        self.file_model.appendFiles(files)
         self.upload_btn.setEnabled(len(self.selected_files) > 0)
+        if not had_files and self.selected_files:
+            self.file_list.setCurrentIndex(self.file_model.index(0))
+            self.updatePreview()
+        if files and self.isQueueRunning():
+            self.queueFiles(files, lambda: self.markQueued(files))
+    
+    def isQueueRunning(self):
+        return (self.upload_thread is not None and self.upload_thread.isRunning()
+                and getattr(self.upload_thread.engine, 'upload_queue', None) is not None)
+    
+    def queueFiles(self, files, callback=None):
+        if self.fileTemplates().description_template.parts:
+            self.renderTemplates(files, lambda names, descriptions: self.addToQueue(files, descriptions, callback))
+        else:
+            self.addToQueue(files, dict.fromkeys(files, self.description_input.toPlainText()), callback)
+    
+    def addToQueue(self, files, descriptions, callback=None):
+        self.upload_queue.add(files, self.target_filenames, descriptions)
+        if callback:
+            callback()
+    
+    def markQueued(self, files):
+        rows = self.file_model.rows
+        self.file_model.setStatuses({rows[file]: 'queued' for file in files if file in rows})
+    
+    def restoreQueue(self):
+        entries = self.upload_queue.pending()
+        if not entries:
+            return
+        for entry in entries:
+            if entry.get('target') and entry['target'] != os.path.basename(entry['path']):
+                self.target_filenames[entry['path']] = entry['target']
+        self.addFiles([entry['path'] for entry in entries])
+        rows = self.file_model.rows
+        self.file_model.setStatuses({rows[entry['path']]: entry['state'] for entry in entries if entry['path'] in rows})
+        self.updateStatus(f"נטענו {len(entries)} קבצים מתור ההעלאה")
+    
+    def showQueueMenu(self, position):
+        rows = sorted(index.row() for index in self.file_list.selectionModel().selectedIndexes())
+        if not rows:
+            return
+        menu = QMenu(self)
+        pause_action = menu.addAction("השהה")
+        resume_action = menu.addAction("המשך")
+        cancel_action = menu.addAction("בטל העלאה")
+        menu.addSeparator()
+        first_action = menu.addAction("העבר לראש התור")
+        menu.addAction("העבר לסוף התור")
+        action = menu.exec_(self.file_list.viewport().mapToGlobal(position))
+        if action is None:
+            return
         
-        if self.selected_files:
-            self.file_list.setCurrentRow(0)
+        files = [self.selected_files[row] for row in rows]
+        queued = {row: self.upload_queue.find(file) for row, file in zip(rows, files)}
+        queued = {row: entry_id for row, entry_id in queued.items() if entry_id is not None}
+        ids = list(queued.values())
+        if action is cancel_action:
+            self.upload_queue.cancel(ids)
+            self.removeFiles(files)
+            return
+        if action is pause_action:
+            self.upload_queue.pause(ids)
+        elif action is resume_action:
+            self.upload_queue.resume(ids)
+        else:
+            self.upload_queue.prioritize(ids, first=action is first_action)
+        
+        statuses = {}
+        for row, entry_id in queued.items():
+            entry = self.upload_queue.get(entry_id)
+            if entry:
+                statuses[row] = entry['state']
+        self.file_model.setStatuses(statuses)
+    
+    def removeFiles(self, files):
+        self.file_model.removeFiles(files)
+        for file in files:
+            self.target_filenames.pop(file, None)
+            self.title_statuses.pop(file, None)
+            self.template_issues.pop(file, None)
+        self.target_name_input.clear()
+        self.updateFileList()
+        self.updatePreview()
+    
+    def updateFileList(self):
+        self.file_model.refresh()
+        self.upload_btn.setEnabled(len(self.selected_files) > 0)
+    
+    def checkTargetNames(self):
+        if self.title_check_thread and self.title_check_thread.isRunning():
+            self.title_check_pending = True
+            return
+        if not self.selected_files:
+            return
+        
+        target_names = {file: self.target_filenames.get(file, os.path.basename(file)) for file in self.selected_files}
+        self.title_check_thread = TitleCheckThread(self.site_input.text(), target_names)
+        self.title_check_thread.status_signal.connect(self.updateStatus)
+        self.title_check_thread.finished_signal.connect(self.targetNamesChecked)
+        self.title_check_thread.finished.connect(self.titleCheckFinished)
+        self.check_names_btn.setEnabled(False)
+        self.updateStatus("בודק שמות יעד...")
+        self.title_check_thread.start()
+    
+    def titleCheckFinished(self):
+        self.title_check_thread.wait()
+        if self.title_check_pending:
+            self.title_check_pending = False
+            self.checkTargetNames()
+    
+    def targetNamesChecked(self, statuses):
+        self.check_names_btn.setEnabled(True)
+        statuses = {file: status for file, status in statuses.items()
+                    if file in self.file_model.rows
+                    and status['name'] == self.target_filenames.get(file, os.path.basename(file))}
+        if not statuses:
+            return
+        self.title_statuses.update(statuses)
+        self.file_model.refresh()
+        problems = sum(1 for file, status in statuses.items()
+                       if status['state'] != 'missing' or status.get('normalized') or status.get('duplicate')
+                       or file in self.template_issues)
+        self.updateStatus(f"בדיקת שמות היעד הסתיימה: {problems} קבצים דורשים תשומת לב")
     
     def clearFiles(self):
-        self.selected_files = []
+        for scan_thread in self.scan_threads + self.render_threads:
+            scan_thread.requestInterruption()
+        self.upload_queue.clear()
+        self.file_model.clear()
         self.target_filenames = {}
+        self.title_statuses = {}
+        self.template_issues = {}
         self.target_name_input.clear()
         self.updateFileList()
+        self.updatePreview()
     
     def uploadFiles(self):
         if not self.selected_files:
             QMessageBox.warning(self, "שגיאה", "אנא בחר לפחות קובץ אחד להעלאה")
             return
         
+        from uploader_core import parse_targets
+        extra_targets = parse_targets(self.extra_targets_input.toPlainText(), self.username_input.text(),
+                                      self.password_input.text())
+        files = list(self.selected_files)
+        self.upload_btn.setEnabled(False)
+        if not extra_targets:
+            self.queueFiles(files, lambda: self.startUpload([], None))
+        elif self.fileTemplates().description_template.parts:
+            self.renderTemplates(files, lambda names, descriptions: self.startUpload(files, extra_targets, descriptions))
+        else:
+            self.startUpload(files, extra_targets)
+    
+    def startUpload(self, files, extra_targets, descriptions=None):
         site = self.site_input.text()
         username = self.username_input.text()
         password = self.password_input.text()
         description = self.description_input.toPlainText()
         summary = self.summary_input.text()
+        concurrency = self.concurrency_input.value()
+        chunk_size = self.chunk_size_input.value() * 1024 * 1024
+        chunk_threshold = self.chunk_threshold_input.value() * 1024 * 1024
+        skip_duplicates = self.skip_duplicates_checkbox.isChecked()
+        verify = self.verify_uploads_checkbox.isChecked()
+        from uploader_core import SessionManager
+        upload_queue = None if extra_targets else self.upload_queue
+        metrics_path = 'hamichlol_uploader_metrics.jsonl' if self.save_metrics_checkbox.isChecked() else None
+        optimize = None
+        if self.optimize_images_checkbox.isChecked():
+            optimize = {'max_dimension': self.max_dimension_input.value()}
         
         self.saveSettings()
         
+        remember_login = self.remember_login_checkbox.isChecked()
+        if self.session_manager is None:
+            self.session_manager = SessionManager()
+        self.session_manager.cookie_path = 'hamichlol_uploader_cookies.json' if remember_login else None
+        
+        self.file_model.clearStatuses()
+        if upload_queue is not None:
+            rows = self.file_model.rows
+            self.file_model.setStatuses({rows[entry['path']]: entry['state'] for entry in upload_queue.pending()
+                                         if entry['path'] in rows})
+        self.transfer_label.clear()
         self.upload_thread = UploadThread(
-            self.selected_files, site, username, password, 
-            description, summary, self.target_filenames
+            files, site, username, password, 
+            description, summary, self.target_filenames, concurrency=concurrency,
+            chunk_size=chunk_size, chunk_threshold=chunk_threshold, skip_duplicates=skip_duplicates,
+            verify=verify, hash_cache=self.hashCache(), session_manager=self.session_manager, optimize=optimize,
+            descriptions=descriptions, metrics_path=metrics_path, extra_targets=extra_targets, upload_queue=upload_queue
         )
         
         self.upload_thread.progress_signal.connect(self.updateProgress)
         self.upload_thread.status_signal.connect(self.updateStatus)
+        self.upload_thread.file_status_signal.connect(self.updateFileStatus)
+        self.upload_thread.stats_signal.connect(self.updateTransferStats)
         self.upload_thread.finished_signal.connect(self.uploadFinished)
         
         self.upload_btn.setEnabled(False)
-        self.select_files_btn.setEnabled(False)
+        self.select_files_btn.setEnabled(upload_queue is not None)
         self.clear_files_btn.setEnabled(False)
 
         self.upload_thread.start()
@@ -475,18 +1127,43 @@ class HamichlolUploader(QMainWindow):
     def updateProgress(self, value):
         self.progress_bar.setValue(value)
     
+    def updateTransferStats(self, stats):
+        from uploader_core import format_size, format_duration
+        lines = [f"{format_size(stats['sent'])} מתוך {format_size(stats['total'])}"
+                 f" | {format_size(stats['rate'])}/s | זמן משוער: {format_duration(stats['eta'])}"]
+        for transfer in stats['files'][:3]:
+            percent = int(transfer['sent'] * 100 / transfer['size']) if transfer['size'] else 100
+            lines.append(f"{transfer['name']}: {percent}% ({format_duration(transfer['eta'])})")
+        if len(stats['files']) > 3:
+            lines.append(f"ועוד {len(stats['files']) - 3} קבצים בהעלאה")
+        if stats['sent'] >= stats['total'] and not stats['files']:
+            lines = [f"הועלו {format_size(stats['transferred'])} ב-{format_duration(stats['elapsed'])}"
+                     f" ({format_size(stats['average'])}/s בממוצע)"]
+        self.transfer_label.setText("\n".join(lines))
+    
     def updateStatus(self, message):
         self.status_label.setText(message)
     
+    def updateFileStatus(self, file_path, state):
+        row = self.file_model.rows.get(file_path)
+        if row is not None:
+            self.file_model.setStatus(row, state)
+    
     def uploadFinished(self, results):
         self.upload_btn.setEnabled(True)
         self.select_files_btn.setEnabled(True)
         self.clear_files_btn.setEnabled(True)
+        self.updateFileList()
+        queued = self.upload_queue.queuedCount()
+        if queued:
+            self.updateStatus(f"{queued} קבצים נוספו לתור בסיום ההעלאה וממתינים להעלאה הבאה")
         
         result_dialog = QMessageBox(self)
         result_dialog.setWindowTitle("תוצאות העלאה")
         result_dialog.setText("\n".join(results))
         result_dialog.setIcon(QMessageBox.Information)
+        if self.upload_thread.metrics_lines:
+            result_dialog.setDetailedText("\n".join(self.upload_thread.metrics_lines))
         result_dialog.setStyleSheet("""
             QMessageBox {
                 background-color: #f9f9f9;
@@ -508,49 +1185,123 @@ class HamichlolUploader(QMainWindow):
         result_dialog.setLayoutDirection(Qt.RightToLeft)
         result_dialog.exec_()
     
-    def saveSettings(self):
-        self.settings.setValue('window_size', self.size())
-        
-        config = configparser.ConfigParser()
-        config['DEFAULT'] = {
+    def currentSettings(self):
+        return {
             'site': self.site_input.text(),
             'username': self.username_input.text(),
             'password': self.password_input.text(),
+            'extra_targets': self.extra_targets_input.toPlainText(),
             'description': self.description_input.toPlainText(),
-            'summary': self.summary_input.text()
+            'summary': self.summary_input.text(),
+            'concurrency': self.concurrency_input.value(),
+            'chunk_size': self.chunk_size_input.value(),
+            'chunk_threshold': self.chunk_threshold_input.value(),
+            'skip_duplicates': self.skip_duplicates_checkbox.isChecked(),
+            'remember_login': self.remember_login_checkbox.isChecked(),
+            'optimize_images': self.optimize_images_checkbox.isChecked(),
+            'save_metrics': self.save_metrics_checkbox.isChecked(),
+            'verify_uploads': self.verify_uploads_checkbox.isChecked(),
+            'small_files_first': self.small_files_first_checkbox.isChecked(),
+            'max_dimension': self.max_dimension_input.value(),
+            'name_template': self.name_template_input.text(),
+            'profile': self.profile_combo.currentText()
         }
-        
-        try:
-            with open('hamichlol_uploader_settings.ini', 'w', encoding='utf-8') as f:
-                config.write(f)
-        except Exception as e:
-            print(f"שגיאה בשמירת הגדרות: {e}")
+    
+    def saveSettings(self):
+        self.settings_store.update(self.currentSettings())
     
     def loadSettings(self):
         try:
-            config = configparser.ConfigParser()
-            config.read('hamichlol_uploader_settings.ini', encoding='utf-8')
-            
-            if 'DEFAULT' in config:
-                self.site_input.setText(config['DEFAULT'].get('site', self.default_site))
-                self.username_input.setText(config['DEFAULT'].get('username', self.default_username))
-                self.password_input.setText(config['DEFAULT'].get('password', self.default_password))
-                self.description_input.setText(config['DEFAULT'].get('description', self.default_description))
-                self.summary_input.setText(config['DEFAULT'].get('summary', self.default_summary))
+            store = self.settings_store
+            self.site_input.setText(store.get('site', self.default_site))
+            self.username_input.setText(store.get('username', self.default_username))
+            self.password_input.setText(store.get('password', self.default_password))
+            self.extra_targets_input.setPlainText(store.get('extra_targets', self.default_extra_targets))
+            self.description_input.setText(store.get('description', self.default_description))
+            self.summary_input.setText(store.get('summary', self.default_summary))
+            self.concurrency_input.setValue(store.getint('concurrency', self.default_concurrency))
+            self.chunk_size_input.setValue(store.getint('chunk_size', self.default_chunk_size))
+            self.chunk_threshold_input.setValue(store.getint('chunk_threshold', self.default_chunk_threshold))
+            self.skip_duplicates_checkbox.setChecked(store.getboolean('skip_duplicates', self.default_skip_duplicates))
+            self.remember_login_checkbox.setChecked(store.getboolean('remember_login', self.default_remember_login))
+            self.optimize_images_checkbox.setChecked(store.getboolean('optimize_images', self.default_optimize_images))
+            self.save_metrics_checkbox.setChecked(store.getboolean('save_metrics', self.default_save_metrics))
+            self.verify_uploads_checkbox.setChecked(store.getboolean('verify_uploads', self.default_verify_uploads))
+            self.small_files_first_checkbox.setChecked(store.getboolean('small_files_first', self.default_small_files_first))
+            self.max_dimension_input.setValue(store.getint('max_dimension', self.default_max_dimension))
+            self.name_template_input.setText(store.get('name_template', self.default_name_template))
+            self.refreshProfiles(store.get('profile', ''))
         except Exception as e:
             print(f"שגיאה בטעינת הגדרות: {e}")
     
+    def refreshProfiles(self, selected=''):
+        self.profile_combo.clear()
+        self.profile_combo.addItem("")
+        self.profile_combo.addItems(self.settings_store.profileNames())
+        index = self.profile_combo.findText(selected)
+        self.profile_combo.setCurrentIndex(max(0, index))
+        self.delete_profile_btn.setEnabled(bool(self.profile_combo.currentText()))
+    
+    def applyProfile(self):
+        name = self.profile_combo.currentText()
+        self.delete_profile_btn.setEnabled(bool(name))
+        if not name:
+            return
+        profile = self.settings_store.profile(name)
+        if 'site' in profile:
+            self.site_input.setText(profile['site'])
+        if 'description' in profile:
+            self.description_input.setText(profile['description'])
+        if 'summary' in profile:
+            self.summary_input.setText(profile['summary'])
+        if 'concurrency' in profile:
+            try:
+                self.concurrency_input.setValue(int(profile['concurrency']))
+            except ValueError:
+                pass
+        self.saveSettings()
+    
+    def saveProfile(self):
+        name, ok = QInputDialog.getText(self, "שמירת פרופיל", "שם הפרופיל:", text=self.profile_combo.currentText())
+        name = name.strip()
+        if not ok or not name:
+            return
+        self.settings_store.saveProfile(name, self.currentSettings())
+        self.refreshProfiles(name)
+        self.saveSettings()
+    
+    def deleteProfile(self):
+        name = self.profile_combo.currentText()
+        if not name:
+            return
+        reply = QMessageBox.question(self, "מחיקת פרופיל", f"למחוק את הפרופיל {name}?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        self.settings_store.deleteProfile(name)
+        self.refreshProfiles()
+        self.saveSettings()
+    
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        self.saveSettings()
+        self.settings.setValue('window_size', self.size())
     
     def closeEvent(self, event):
+        for scan_thread in self.scan_threads + self.render_threads:
+            scan_thread.requestInterruption()
+            scan_thread.wait()
         self.saveSettings()
+        self.settings_store.close()
+        if not self.isQueueRunning():
+            self.upload_queue.compact()
         super().closeEvent(event)
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setLayoutDirection(Qt.RightToLeft)
     window = HamichlolUploader()
     window.show()
+    if os.environ.get('HAMICHLOL_STARTUP_BENCHMARK'):
+        QTimer.singleShot(0, app.quit)
     sys.exit(app.exec_())
\ No newline at end of file
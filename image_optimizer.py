@@ -0,0 +1,178 @@
+import os
+import re
+import struct
+import zlib
+from xml.etree import ElementTree
+
+OPTIMIZABLE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.svg')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_METADATA_CHUNKS = (b'tEXt', b'zTXt', b'iTXt', b'tIME', b'eXIf')
+
+JPEG_METADATA_MARKERS = (0xE1, 0xED, 0xFE)
+
+DEFAULT_OPTIONS = {
+    'strip_metadata': True,
+    'recompress_png': True,
+    'minify_svg': True,
+    'max_dimension': 0
+}
+
+def png_chunks(data):
+    position = len(PNG_SIGNATURE)
+    while position + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        yield kind, data[position + 8:position + 8 + length]
+        position += 12 + length
+
+def png_chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+def recompress(streams, block_size=1024 * 1024):
+    decompressor = zlib.decompressobj()
+    compressors = [zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+                   for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)]
+    outputs = [[] for _ in compressors]
+    for data in streams:
+        while data:
+            raw = decompressor.decompress(data, block_size)
+            data = decompressor.unconsumed_tail
+            for compressor, output in zip(compressors, outputs):
+                output.append(compressor.compress(raw))
+    raw = decompressor.flush()
+    for compressor, output in zip(compressors, outputs):
+        output.append(compressor.compress(raw) + compressor.flush())
+    return min((b''.join(output) for output in outputs), key=len)
+
+def optimize_png(data, options):
+    if not data.startswith(PNG_SIGNATURE):
+        return data
+    chunks = list(png_chunks(data))
+
+    image_data = None
+    if options.get('recompress_png'):
+        image_data = recompress(body for kind, body in chunks if kind == b'IDAT')
+
+    out = [PNG_SIGNATURE]
+    idat_written = False
+    for kind, body in chunks:
+        if kind == b'IDAT' and image_data is not None:
+            if not idat_written:
+                out.append(png_chunk(kind, image_data))
+                idat_written = True
+        elif options.get('strip_metadata') and kind in PNG_METADATA_CHUNKS:
+            continue
+        else:
+            out.append(png_chunk(kind, body))
+    return b''.join(out)
+
+def exif_orientation(tiff):
+    try:
+        order = '<' if tiff[:2] == b'II' else '>'
+        offset = struct.unpack(order + 'I', tiff[4:8])[0]
+        count = struct.unpack(order + 'H', tiff[offset:offset + 2])[0]
+        for i in range(count):
+            entry = tiff[offset + 2 + i * 12:offset + 14 + i * 12]
+            tag = struct.unpack(order + 'H', entry[:2])[0]
+            if tag == 0x0112:
+                return struct.unpack(order + 'H', entry[8:10])[0]
+    except struct.error:
+        return None
+    return None
+
+def strip_jpeg_metadata(data):
+    if not data.startswith(b'\xff\xd8'):
+        return data
+
+    out = [data[:2]]
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            return data
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker == 0xDA:
+            out.append(data[position:])
+            return b''.join(out)
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            out.append(data[position:position + 2])
+            position += 2
+            continue
+
+        length = struct.unpack('>H', data[position + 2:position + 4])[0]
+        segment = data[position:position + 2 + length]
+        keep = marker not in JPEG_METADATA_MARKERS
+        if marker == 0xE1 and segment[4:10] == b'Exif\x00\x00':
+            keep = exif_orientation(segment[10:]) not in (None, 1)
+        if keep:
+            out.append(segment)
+        position += 2 + length
+    return data
+
+def minify_svg(data):
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    text = re.sub(r'<metadata\b[^>]*/>|<metadata\b.*?</metadata>', '', text, flags=re.S)
+    if '<text' not in text:
+        text = re.sub(r'>\s+<', '><', text)
+    minified = text.strip().encode('utf-8')
+    try:
+        ElementTree.fromstring(minified)
+    except ElementTree.ParseError:
+        return data
+    return minified
+
+def downscale(file_path, max_dimension, output_path):
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return False
+    with Image.open(file_path) as image:
+        if max(image.size) <= max_dimension or getattr(image, 'n_frames', 1) > 1:
+            return False
+        image_format = image.format
+        icc_profile = image.info.get('icc_profile')
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        if image_format == 'JPEG':
+            image.save(output_path, format='JPEG', quality=95, icc_profile=icc_profile)
+        else:
+            image.save(output_path, format=image_format, optimize=True, icc_profile=icc_profile)
+    return True
+
+def optimize_file(file_path, output_path, options=None):
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    original_size = os.path.getsize(file_path)
+    result = {'path': file_path, 'original_size': original_size, 'size': original_size}
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in OPTIMIZABLE_EXTENSIONS:
+        return result
+
+    try:
+        source = file_path
+        if options.get('max_dimension') and extension != '.svg':
+            if downscale(file_path, options['max_dimension'], output_path):
+                source = output_path
+
+        with open(source, 'rb') as f:
+            data = f.read()
+        if extension == '.png':
+            data = optimize_png(data, options)
+        elif extension in ('.jpg', '.jpeg') and options.get('strip_metadata'):
+            data = strip_jpeg_metadata(data)
+        elif extension == '.svg' and options.get('minify_svg'):
+            data = minify_svg(data)
+
+        if len(data) >= original_size:
+            return result
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        result.update(path=output_path, size=len(data))
+    except Exception:
+        return result
+    return result
@@ -0,0 +1,82 @@
+import hashlib
+import os
+
+import pytest
+
+from fake_wiki import normalize_name, start_server
+from upload_state import UploadQueue
+from uploader_core import FanOutEngine, HashCache, SessionManager, UploadEngine
+
+@pytest.fixture
+def wiki():
+    server = start_server(latency=0.01)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def site(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+def stored(server):
+    return server.RequestHandlerClass.state
+
+def make_files(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f'file{i}.pdf'
+        path.write_bytes(os.urandom(size))
+        paths.append(str(path))
+    return paths
+
+def engine(server, tmp_path, files, **options):
+    return UploadEngine(files, site(server), 'Benchmark', 'secret', 'desc', 'summary', {},
+                        hash_cache=HashCache(str(tmp_path / 'hashes.json')), session_manager=SessionManager(),
+                        journal_path=str(tmp_path / 'journal.jsonl'), **options)
+
+def test_upload_and_skip_on_rerun(wiki, tmp_path):
+    files = make_files(tmp_path, [5000, 3 * 1024 * 1024, 7000])
+    records = engine(wiki, tmp_path, files, chunk_size=1024 * 1024, chunk_threshold=2 * 1024 * 1024,
+                     verify=True).run()
+    assert [(record['state'], record.get('verified')) for record in records] == [('uploaded', True)] * 3
+    for path in files:
+        with open(path, 'rb') as f:
+            assert stored(wiki).files[normalize_name(os.path.basename(path))]['sha1'] == hashlib.sha1(f.read()).hexdigest()
+    assert stored(wiki).counters['chunks'] == 3
+    
+    records = engine(wiki, tmp_path, files).run()
+    assert [record['state'] for record in records] == ['skipped'] * 3
+    assert stored(wiki).counters['uploads'] == 3
+
+def test_resuming_an_upload_in_flight_uploads_it_once(wiki, tmp_path):
+    queue = UploadQueue(str(tmp_path / 'queue.jsonl'))
+    queue.add(make_files(tmp_path, [64 * 1024] * 4))
+    toggled = []
+    
+    def file_callback(index, state):
+        if state == 'uploading' and not toggled:
+            ids = [entry['id'] for entry in queue.pending() if entry['state'] == 'uploading']
+            toggled.extend(ids)
+            queue.pause(ids)
+            queue.resume(ids)
+    
+    records = engine(wiki, tmp_path, [], concurrency=1, upload_queue=queue, file_callback=file_callback).run()
+    assert toggled
+    assert [record['state'] for record in records] == ['uploaded'] * 4
+    assert stored(wiki).counters['uploads'] == 4
+    assert queue.pending() == []
+
+def test_fan_out_reads_each_block_once(tmp_path):
+    servers = [start_server(), start_server()]
+    try:
+        files = make_files(tmp_path, [300_000, 200_000])
+        targets = [{'site': site(server), 'username': 'Benchmark', 'password': 'secret'} for server in servers]
+        fan_out = FanOutEngine(files, targets, 'desc', 'summary', {}, hash_cache=HashCache(str(tmp_path / 'h.json')),
+                               journal_path=str(tmp_path / 'journal.jsonl'))
+        records = fan_out.run()
+        assert [record['state'] for record in records] == ['uploaded'] * 4
+        assert fan_out.block_cache.disk_reads == fan_out.block_cache.cache_reads
+        assert fan_out.block_cache.blocks == {}
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,90 @@
+import os
+import struct
+import zlib
+from xml.etree import ElementTree
+
+import pytest
+
+from image_optimizer import (DEFAULT_OPTIONS, PNG_SIGNATURE, minify_svg, optimize_file, optimize_png, png_chunk,
+                             png_chunks, strip_jpeg_metadata)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+def read_data(name):
+    with open(os.path.join(DATA_DIR, name), 'rb') as f:
+        return f.read()
+
+def test_minify_svg_drops_inkscape_metadata():
+    minified = minify_svg(read_data('inkscape_drawing.svg'))
+    root = ElementTree.fromstring(minified)
+    assert b'<metadata' not in minified
+    assert b'dc:title' not in minified
+    assert [child.tag.split('}')[1] for child in root.iter() if child.tag.endswith(('rect', 'circle'))] == ['rect', 'circle']
+
+def test_minify_svg_drops_self_closing_metadata():
+    data = b'<svg xmlns="http://www.w3.org/2000/svg"><metadata id="m"/>\n  <rect width="1" height="1"/></svg>'
+    assert minify_svg(data) == b'<svg xmlns="http://www.w3.org/2000/svg"><rect width="1" height="1"/></svg>'
+
+def test_minify_svg_keeps_original_when_output_does_not_parse():
+    data = b'<svg xmlns="http://www.w3.org/2000/svg"><desc><![CDATA[<metadata>]]></desc><metadata>m</metadata></svg>'
+    assert minify_svg(data) == data
+
+def test_optimize_file_uploads_valid_svg(tmp_path):
+    source = tmp_path / 'drawing.svg'
+    source.write_bytes(read_data('inkscape_drawing.svg'))
+    result = optimize_file(str(source), str(tmp_path / 'out.svg'))
+    assert result['size'] < result['original_size']
+    with open(result['path'], 'rb') as f:
+        ElementTree.fromstring(f.read())
+
+def make_png(width, height, rows, extra_chunks=()):
+    raw = b''.join(b'\x00' + row for row in rows)
+    compressed = zlib.compress(raw, 1)
+    chunks = [png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))]
+    chunks += [png_chunk(kind, body) for kind, body in extra_chunks]
+    chunks += [png_chunk(b'IDAT', compressed[i:i + 100]) for i in range(0, len(compressed), 100)]
+    chunks.append(png_chunk(b'IEND', b''))
+    return PNG_SIGNATURE + b''.join(chunks), raw
+
+def test_optimize_png_recompresses_and_strips_text():
+    rows = [b''.join(bytes([x % 7, y % 5, 0]) for x in range(64)) for y in range(64)]
+    data, raw = make_png(64, 64, rows, [(b'tEXt', b'Comment\x00hello')])
+    optimized = optimize_png(data, DEFAULT_OPTIONS)
+    chunks = list(png_chunks(optimized))
+    assert [kind for kind, _ in chunks] == [b'IHDR', b'IDAT', b'IEND']
+    assert zlib.decompress(chunks[1][1]) == raw
+    assert len(optimized) < len(data)
+
+def test_optimize_png_keeps_text_when_not_stripping():
+    data, _ = make_png(1, 1, [b'\x00\x00\x00'], [(b'tEXt', b'Comment\x00hello')])
+    options = dict(DEFAULT_OPTIONS, strip_metadata=False)
+    assert b'tEXt' in [kind for kind, _ in png_chunks(optimize_png(data, options))]
+
+def jpeg_segment(marker, body):
+    return bytes([0xFF, marker]) + struct.pack('>H', len(body) + 2) + body
+
+def test_strip_jpeg_metadata_drops_comments_and_keeps_image_data():
+    jfif = jpeg_segment(0xE0, b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00')
+    comment = jpeg_segment(0xFE, b'made with a camera')
+    iptc = jpeg_segment(0xED, b'Photoshop 3.0\x00' + b'x' * 20)
+    scan = b'\xff\xda' + struct.pack('>H', 4) + b'\x01\x02' + b'\x12\x34\xff\x00\x56\xff\xd9'
+    data = b'\xff\xd8' + jfif + comment + iptc + scan
+    assert strip_jpeg_metadata(data) == b'\xff\xd8' + jfif + scan
+
+def test_strip_jpeg_metadata_leaves_other_data_alone():
+    assert strip_jpeg_metadata(b'not a jpeg') == b'not a jpeg'
+
+def test_optimize_file_keeps_original_when_not_smaller(tmp_path):
+    source = tmp_path / 'a.svg'
+    source.write_bytes(b'<svg xmlns="http://www.w3.org/2000/svg"/>')
+    result = optimize_file(str(source), str(tmp_path / 'out.svg'))
+    assert result == {'path': str(source), 'original_size': source.stat().st_size, 'size': source.stat().st_size}
+    assert not (tmp_path / 'out.svg').exists()
+
+def test_optimize_file_downscales_large_images(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    source = tmp_path / 'big.png'
+    Image.new('RGB', (1200, 600), (200, 10, 10)).save(str(source))
+    result = optimize_file(str(source), str(tmp_path / 'out.png'), {'max_dimension': 300})
+    with Image.open(result['path']) as image:
+        assert image.size == (300, 150)
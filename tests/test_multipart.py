@@ -0,0 +1,50 @@
+import os
+
+from fake_wiki import parse_multipart
+from uploader_core import MultipartFileStream
+
+def read_all(stream, size):
+    out = b''
+    while True:
+        data = stream.read(size)
+        if not data:
+            return out
+        out += data
+
+def test_stream_encodes_fields_and_file(tmp_path):
+    content = os.urandom(200_000)
+    path = tmp_path / 'a.png'
+    path.write_bytes(content)
+    sent = []
+    stream = MultipartFileStream({'action': 'upload', 'comment': 'שלום'}, 'file', 'a"b.png', str(path),
+                                 progress_callback=sent.append, block_size=4096)
+    body = read_all(stream, 1000)
+    assert len(body) == len(stream)
+    fields, files = parse_multipart(body, stream.content_type)
+    assert fields == {'action': 'upload', 'comment': 'שלום'}
+    assert files['file'] == content
+    assert sum(sent) == len(content)
+    assert b'filename="a%22b.png"' in body
+    assert stream.file is None
+
+def test_stream_sends_only_the_requested_range(tmp_path):
+    content = os.urandom(10_000)
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(content)
+    stream = MultipartFileStream({'offset': 3000}, 'chunk', 'a.pdf', str(path), offset=3000, length=2500)
+    body = b''.join(stream)
+    assert len(body) == len(stream)
+    assert parse_multipart(body, stream.content_type)[1]['chunk'] == content[3000:5500]
+
+def test_stream_reads_through_reader(tmp_path):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'x' * 100)
+    calls = []
+    
+    def reader(file_path, position, length, f):
+        calls.append((file_path, position, length))
+        return b'y' * length
+    
+    stream = MultipartFileStream({}, 'file', 'a.pdf', str(path), block_size=40, reader=reader)
+    assert parse_multipart(read_all(stream, 64), stream.content_type)[1]['file'] == b'y' * 100
+    assert calls == [(str(path), 0, 40), (str(path), 40, 40), (str(path), 80, 20)]
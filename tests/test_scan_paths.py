@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from uploader_core import scan_paths
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb'):
+        pass
+
+def relative(paths, root):
+    return [os.path.relpath(path, root).replace(os.sep, '/') for path in paths]
+
+def test_scan_finds_supported_files_in_order(tmp_path):
+    for name in ('b.png', 'a.JPG', 'notes.txt', 'sub/c.pdf', 'sub/deeper/d.svg', 'z.gif'):
+        touch(str(tmp_path / name))
+    assert relative(scan_paths([str(tmp_path)]), tmp_path) == ['a.JPG', 'b.png', 'z.gif', 'sub/c.pdf', 'sub/deeper/d.svg']
+
+def test_scan_without_recursion(tmp_path):
+    touch(str(tmp_path / 'a.png'))
+    touch(str(tmp_path / 'sub' / 'b.png'))
+    assert relative(scan_paths([str(tmp_path)], recursive=False), tmp_path) == ['a.png']
+
+def test_scan_accepts_files_and_skips_missing_paths(tmp_path):
+    touch(str(tmp_path / 'a.png'))
+    touch(str(tmp_path / 'a.txt'))
+    paths = [str(tmp_path / 'a.png'), str(tmp_path / 'a.txt'), str(tmp_path / 'missing.png')]
+    assert relative(scan_paths(paths), tmp_path) == ['a.png']
+
+def test_scan_does_not_follow_directory_links(tmp_path):
+    touch(str(tmp_path / 'd' / 'a.png'))
+    try:
+        os.symlink('..', str(tmp_path / 'd' / 'up'), target_is_directory=True)
+        os.symlink('d', str(tmp_path / 'alias'), target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks are not available")
+    assert relative(scan_paths([str(tmp_path)]), tmp_path) == ['d/a.png']
+
+def test_scan_visits_each_directory_once(tmp_path):
+    touch(str(tmp_path / 'd' / 'a.png'))
+    assert relative(scan_paths([str(tmp_path), str(tmp_path / 'd')]), tmp_path) == ['d/a.png']
+
+def test_scan_stops_when_asked(tmp_path):
+    for i in range(3):
+        touch(str(tmp_path / f'd{i}' / 'a.png'))
+    found = []
+    for path in scan_paths([str(tmp_path)], should_stop=lambda: len(found) >= 1):
+        found.append(path)
+    assert len(found) == 1
@@ -0,0 +1,103 @@
+import json
+import threading
+
+from upload_state import UploadQueue
+
+def make_files(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f'f{i}.pdf'
+        path.write_bytes(b'x' * size)
+        paths.append(str(path))
+    return paths
+
+def take_all(queue):
+    taken = []
+    while True:
+        entry = queue.take()
+        if entry is None:
+            return taken
+        taken.append(entry)
+
+def test_take_follows_priority_then_insertion_order(tmp_path):
+    files = make_files(tmp_path, [300, 100, 200])
+    queue = UploadQueue(str(tmp_path / 'q.jsonl'))
+    ids = queue.add(files)
+    queue.prioritize([ids[2]])
+    assert [entry['path'] for entry in take_all(queue)] == [files[2], files[0], files[1]]
+
+def test_small_first_orders_by_size(tmp_path):
+    files = make_files(tmp_path, [300, 100, 200])
+    queue = UploadQueue(str(tmp_path / 'q.jsonl'), small_first=True)
+    queue.add(files)
+    assert [entry['size'] for entry in take_all(queue)] == [100, 200, 300]
+
+def test_paused_entries_are_not_taken_until_resumed(tmp_path):
+    files = make_files(tmp_path, [10, 10])
+    queue = UploadQueue(str(tmp_path / 'q.jsonl'))
+    ids = queue.add(files)
+    assert queue.pause([ids[0]]) == [ids[0]]
+    assert [entry['id'] for entry in take_all(queue)] == [ids[1]]
+    assert queue.resume([ids[0]]) == [ids[0]]
+    assert [entry['id'] for entry in take_all(queue)] == [ids[0]]
+
+def test_resuming_an_entry_in_flight_does_not_queue_it_again(tmp_path):
+    files = make_files(tmp_path, [10, 10])
+    queue = UploadQueue(str(tmp_path / 'q.jsonl'))
+    ids = queue.add(files)
+    entry = queue.take()
+    queue.pause([entry['id']])
+    queue.resume([entry['id']])
+    assert queue.state(entry['id']) == 'uploading'
+    assert [other['id'] for other in take_all(queue)] == [ids[1]]
+    queue.finish(entry['id'], 'uploaded')
+    assert queue.get(entry['id']) is None
+
+def test_finish_states(tmp_path):
+    files = make_files(tmp_path, [10, 10, 10])
+    queue = UploadQueue(str(tmp_path / 'q.jsonl'))
+    uploaded, failed, paused = queue.add(files)
+    take_all(queue)
+    queue.pause([paused])
+    queue.finish(uploaded, 'uploaded')
+    queue.finish(failed, 'failed')
+    queue.finish(paused, 'paused')
+    assert queue.get(uploaded) is None
+    assert queue.state(failed) == 'failed'
+    assert queue.state(paused) == 'paused'
+    assert queue.add([files[1]]) == [failed]
+    assert queue.state(failed) == 'queued'
+
+def test_cancel_removes_entries(tmp_path):
+    files = make_files(tmp_path, [10, 10])
+    queue = UploadQueue(str(tmp_path / 'q.jsonl'))
+    ids = queue.add(files)
+    assert queue.cancel([ids[0], 999]) == [ids[0]]
+    assert queue.state(ids[0]) == 'cancelled'
+    assert queue.find(files[0]) is None
+    assert [entry['id'] for entry in take_all(queue)] == [ids[1]]
+
+def test_reload_requeues_entries_that_were_uploading(tmp_path):
+    files = make_files(tmp_path, [10, 10, 10])
+    path = str(tmp_path / 'q.jsonl')
+    queue = UploadQueue(path)
+    ids = queue.add(files)
+    queue.take()
+    queue.pause([ids[1]])
+    queue.cancel([ids[2]])
+    queue.close()
+    
+    reloaded = UploadQueue(path)
+    assert [(entry['id'], entry['state']) for entry in reloaded.pending()] == [(ids[0], 'queued'), (ids[1], 'paused')]
+    with open(path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+
+def test_take_waits_for_entries_added_later(tmp_path):
+    files = make_files(tmp_path, [10])
+    queue = UploadQueue(str(tmp_path / 'q.jsonl'))
+    assert queue.take(timeout=0.01) is None
+    threading.Timer(0.05, lambda: queue.add(files)).start()
+    entry = queue.take(timeout=5)
+    assert entry['path'] == files[0]
+    with open(tmp_path / 'q.jsonl', encoding='utf-8') as f:
+        assert json.loads(f.readline())['path'] == files[0]
@@ -0,0 +1,473 @@
+import os
+import json
+import threading
+import time
+import hashlib
+import configparser
+import heapq
+
+def file_sha1(file_path, block_size=1024 * 1024):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def atomic_write(path, write):
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        write(f)
+    os.replace(temp_path, path)
+
+class JsonLineLog:
+    KEY_FIELD = 'key'
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.file = None
+
+    def readLog(self):
+        lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get('discard'):
+                        self.entries.pop(record[self.KEY_FIELD], None)
+                    else:
+                        self.entries.setdefault(record[self.KEY_FIELD], {}).update(record)
+        except FileNotFoundError:
+            pass
+        return lines
+
+    def append(self, record):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def writeEntries(self, f):
+        for entry in self.entries.values():
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def compact(self):
+        with self.lock:
+            self.close()
+            atomic_write(self.path, self.writeEntries)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class HashCache:
+    def __init__(self, path='hamichlol_uploader_hashes.json', max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def lookup(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = os.path.abspath(file_path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry or entry['size'] != stat.st_size or entry['mtime'] != int(stat.st_mtime):
+                return None
+            entry['used'] = time.time()
+            self.dirty = True
+            return entry
+
+    def sha1(self, file_path):
+        entry = self.lookup(file_path)
+        if entry and entry.get('sha1'):
+            return entry['sha1']
+        digest = file_sha1(file_path)
+        self.store(file_path, digest)
+        return digest
+
+    def store(self, file_path, digest=None):
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry or entry['size'] != stat.st_size or entry['mtime'] != int(stat.st_mtime):
+                entry = self.entries[key] = {
+                    'size': stat.st_size,
+                    'mtime': int(stat.st_mtime),
+                    'sha1': None,
+                    'uploads': {}
+                }
+            if digest:
+                entry['sha1'] = digest
+            entry['used'] = time.time()
+            self.dirty = True
+            return entry
+
+    def uploaded(self, file_path, site):
+        entry = self.lookup(file_path)
+        if entry:
+            return entry.get('uploads', {}).get(site)
+        return None
+
+    def recordUpload(self, file_path, site, target_name, digest=None):
+        entry = self.store(file_path, digest)
+        with self.lock:
+            entry.setdefault('uploads', {})[site] = {'target': target_name, 'time': time.time()}
+            self.dirty = True
+
+    def forgetUpload(self, file_path, site):
+        with self.lock:
+            entry = self.entries.get(os.path.abspath(file_path))
+            if entry and entry.get('uploads', {}).pop(site, None) is not None:
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            if len(self.entries) > self.max_entries:
+                newest = sorted(self.entries.items(), key=lambda item: item[1].get('used', 0), reverse=True)
+                self.entries = dict(newest[:self.max_entries])
+            data = json.dumps(self.entries, ensure_ascii=False)
+            self.dirty = False
+        try:
+            atomic_write(self.path, lambda f: f.write(data))
+        except Exception as e:
+            print(f"שגיאה בשמירת מטמון החתימות: {e}")
+
+class SettingsStore:
+    PROFILE_PREFIX = 'profile:'
+    PROFILE_FIELDS = ('site', 'description', 'summary', 'concurrency')
+    
+    def __init__(self, path='hamichlol_uploader_settings.ini', delay=0.5):
+        self.path = path
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.values = {}
+        self.profiles = {}
+        self.active_profile = None
+        self.timer = None
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        config = configparser.ConfigParser(default_section='__defaults__')
+        try:
+            config.read(self.path, encoding='utf-8')
+        except Exception as e:
+            print(f"שגיאה בטעינת הגדרות: {e}")
+            return
+        for section in config.sections():
+            values = {}
+            for key in config[section]:
+                try:
+                    values[key] = config.get(section, key)
+                except configparser.Error:
+                    values[key] = config.get(section, key, raw=True)
+            if section == 'DEFAULT':
+                self.values = values
+            elif section.startswith(self.PROFILE_PREFIX):
+                self.profiles[section[len(self.PROFILE_PREFIX):]] = values
+
+    def get(self, key, fallback=None):
+        with self.lock:
+            profile = self.profiles.get(self.active_profile, {})
+            return profile.get(key, self.values.get(key, fallback))
+
+    def getint(self, key, fallback=None):
+        try:
+            return int(self.get(key, fallback))
+        except (TypeError, ValueError):
+            return fallback
+
+    def getboolean(self, key, fallback=None):
+        value = self.get(key)
+        if value is None:
+            return fallback
+        return configparser.ConfigParser.BOOLEAN_STATES.get(str(value).lower(), fallback)
+
+    def update(self, values):
+        values = {key: str(value) for key, value in values.items()}
+        with self.lock:
+            if all(self.values.get(key) == value for key, value in values.items()):
+                return
+            self.values.update(values)
+        self.schedule()
+
+    def profileNames(self):
+        with self.lock:
+            return sorted(self.profiles)
+
+    def profile(self, name):
+        with self.lock:
+            return dict(self.profiles.get(name, {}))
+
+    def saveProfile(self, name, values):
+        with self.lock:
+            self.profiles[name] = {key: str(values[key]) for key in self.PROFILE_FIELDS if key in values}
+        self.schedule()
+
+    def deleteProfile(self, name):
+        with self.lock:
+            if self.profiles.pop(name, None) is None:
+                return
+        self.schedule()
+
+    def schedule(self):
+        with self.lock:
+            self.dirty = True
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.delay, self.save)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def save(self):
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                config = configparser.ConfigParser(default_section='__defaults__')
+                config['DEFAULT'] = {key: value.replace('%', '%%') for key, value in self.values.items()}
+                for name, values in sorted(self.profiles.items()):
+                    config[self.PROFILE_PREFIX + name] = {key: value.replace('%', '%%') for key, value in values.items()}
+                self.dirty = False
+            try:
+                atomic_write(self.path, config.write)
+            except Exception as e:
+                print(f"שגיאה בשמירת הגדרות: {e}")
+
+    def close(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        self.save()
+
+class UploadJournal(JsonLineLog):
+    def __init__(self, path='hamichlol_uploader_journal.jsonl'):
+        JsonLineLog.__init__(self, path)
+        self.load()
+
+    @staticmethod
+    def key(site, file_path, target_name):
+        stat = os.stat(file_path)
+        return f"{site}|{os.path.abspath(file_path)}|{target_name}|{stat.st_size}|{int(stat.st_mtime)}"
+
+    def load(self):
+        if self.readLog() > len(self.entries):
+            self.compact()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def record(self, key, **fields):
+        with self.lock:
+            self.entries.setdefault(key, {'key': key}).update(fields)
+            self.append({'key': key, **fields})
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                if self.entries.pop(key, None) is not None:
+                    self.append({'key': key, 'discard': True})
+
+class UploadQueue(JsonLineLog):
+    KEY_FIELD = 'id'
+    
+    def __init__(self, path='hamichlol_uploader_queue.jsonl', small_first=False):
+        JsonLineLog.__init__(self, path)
+        self.small_first = small_first
+        self.changed = threading.Condition(self.lock)
+        self.paths = {}
+        self.heap = []
+        self.taken = set()
+        self.next_id = 1
+        self.load()
+
+    def load(self):
+        lines = self.readLog()
+        for entry in self.entries.values():
+            if entry.get('state') == 'uploading':
+                entry['state'] = 'queued'
+            self.paths[entry['path']] = entry['id']
+        self.next_id = max(self.entries, default=0) + 1
+        self.rebuild()
+        if lines > len(self.entries):
+            self.compact()
+
+    def update(self, entry_id, **fields):
+        entry = self.entries[entry_id]
+        entry.update(fields)
+        self.append({'id': entry_id, **fields})
+        if entry['state'] == 'queued' and ('state' in fields or 'priority' in fields):
+            heapq.heappush(self.heap, (self.order(entry), entry_id))
+            self.changed.notify_all()
+
+    def rebuild(self):
+        self.heap = [(self.order(entry), entry['id']) for entry in self.entries.values() if entry['state'] == 'queued']
+        heapq.heapify(self.heap)
+
+    def setSmallFirst(self, small_first):
+        with self.lock:
+            if small_first != self.small_first:
+                self.small_first = small_first
+                self.rebuild()
+
+    def remove(self, entry_id):
+        entry = self.entries.pop(entry_id, None)
+        if entry is not None:
+            self.paths.pop(entry['path'], None)
+            self.append({'id': entry_id, 'discard': True})
+
+    def add(self, files, target_filenames=None, descriptions=None, priority=0):
+        target_filenames = target_filenames or {}
+        descriptions = descriptions or {}
+        ids = []
+        with self.lock:
+            for file_path in files:
+                fields = {'target': target_filenames.get(file_path, os.path.basename(file_path)),
+                          'description': descriptions.get(file_path)}
+                entry_id = self.paths.get(file_path)
+                if entry_id is not None:
+                    entry = self.entries[entry_id]
+                    if entry['state'] == 'failed':
+                        fields['state'] = 'queued'
+                    if entry['state'] != 'uploading':
+                        self.update(entry_id, **fields)
+                    ids.append(entry_id)
+                    continue
+                try:
+                    size = os.path.getsize(file_path)
+                except OSError:
+                    size = 0
+                entry_id = self.next_id
+                self.next_id += 1
+                self.entries[entry_id] = {'id': entry_id}
+                self.paths[file_path] = entry_id
+                self.update(entry_id, path=file_path, size=size, priority=priority, state='queued', **fields)
+                ids.append(entry_id)
+        return ids
+
+    def find(self, file_path):
+        with self.lock:
+            return self.paths.get(file_path)
+
+    def get(self, entry_id):
+        with self.lock:
+            entry = self.entries.get(entry_id)
+            return dict(entry) if entry else None
+
+    def pending(self):
+        with self.lock:
+            return [dict(entry) for entry in sorted(self.entries.values(), key=self.order)]
+
+    def queuedCount(self):
+        with self.lock:
+            return sum(1 for entry in self.entries.values() if entry['state'] == 'queued')
+
+    def order(self, entry):
+        return (-entry.get('priority', 0), entry.get('size', 0) if self.small_first else 0, entry['id'])
+
+    def setState(self, ids, state, from_states):
+        changed = []
+        with self.lock:
+            for entry_id in ids:
+                entry = self.entries.get(entry_id)
+                if entry is not None and entry['state'] in from_states:
+                    self.update(entry_id, state=state)
+                    changed.append(entry_id)
+        return changed
+
+    def pause(self, ids):
+        return self.setState(ids, 'paused', ('queued', 'uploading'))
+
+    def resume(self, ids):
+        changed = []
+        with self.lock:
+            for entry_id in ids:
+                entry = self.entries.get(entry_id)
+                if entry is None or entry['state'] not in ('paused', 'failed'):
+                    continue
+                self.update(entry_id, state='uploading' if entry_id in self.taken else 'queued')
+                changed.append(entry_id)
+        return changed
+
+    def cancel(self, ids):
+        with self.lock:
+            cancelled = [entry_id for entry_id in ids if entry_id in self.entries]
+            for entry_id in cancelled:
+                self.remove(entry_id)
+        return cancelled
+
+    def prioritize(self, ids, first=True):
+        with self.lock:
+            priorities = [entry.get('priority', 0) for entry in self.entries.values()]
+            priority = (max(priorities, default=0) + 1) if first else (min(priorities, default=0) - 1)
+            for entry_id in ids:
+                if entry_id in self.entries:
+                    self.update(entry_id, priority=priority)
+
+    def take(self, timeout=None):
+        with self.lock:
+            while True:
+                while self.heap:
+                    key, entry_id = heapq.heappop(self.heap)
+                    entry = self.entries.get(entry_id)
+                    if entry is not None and entry['state'] == 'queued' and self.order(entry) == key:
+                        self.update(entry_id, state='uploading')
+                        self.taken.add(entry_id)
+                        return dict(entry)
+                if not timeout:
+                    return None
+                self.changed.wait(timeout)
+                timeout = None
+
+    def notify(self):
+        with self.lock:
+            self.changed.notify_all()
+
+    def state(self, entry_id):
+        with self.lock:
+            entry = self.entries.get(entry_id)
+            return entry['state'] if entry else 'cancelled'
+
+    def finish(self, entry_id, state):
+        with self.lock:
+            self.taken.discard(entry_id)
+            entry = self.entries.get(entry_id)
+            if entry is None:
+                return
+            if state in ('uploaded', 'skipped'):
+                self.remove(entry_id)
+            elif state == 'failed':
+                self.update(entry_id, state='failed')
+            elif entry['state'] == 'uploading':
+                self.update(entry_id, state='queued')
+
+    def clear(self):
+        with self.lock:
+            for entry_id in [entry_id for entry_id, entry in self.entries.items() if entry['state'] != 'uploading']:
+                self.remove(entry_id)
@@ -0,0 +1,160 @@
+import csv
+import datetime
+import os
+import re
+
+PLACEHOLDER = re.compile(r'\{([^\W\d]\w*)(?::([^{}|]*))?\}')
+
+FILE_FIELDS = ('stem', 'name', 'ext', 'folder', 'index', 'count', 'date', 'time', 'today', 'size')
+EXIF_FIELDS = ('taken', 'camera', 'make', 'model', 'width', 'height', 'artist', 'copyright')
+
+EXIF_TAGS = {
+    'DateTimeOriginal': 'taken',
+    'DateTime': 'taken',
+    'Make': 'make',
+    'Model': 'model',
+    'Artist': 'artist',
+    'Copyright': 'copyright'
+}
+
+class Template:
+    def __init__(self, text):
+        self.text = text
+        self.parts = []
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            self.parts.append((text[position:match.start()], match.group(1), match.group(2), match.group(0)))
+            position = match.end()
+        self.tail = text[position:]
+        self.fields = {field for _, field, _, _ in self.parts}
+
+    def render(self, context):
+        out = []
+        for literal, field, spec, original in self.parts:
+            out.append(literal)
+            if field not in context:
+                out.append(original)
+                continue
+            value = context[field]
+            try:
+                out.append(format(value, spec) if spec else str(value))
+            except (ValueError, TypeError):
+                out.append(str(value))
+        out.append(self.tail)
+        return ''.join(out)
+
+    def missing(self, context):
+        return [original for literal, field, _, original in self.parts
+                if field not in context and not literal.endswith('{')]
+
+def read_exif(file_path):
+    try:
+        from PIL import Image, ExifTags
+    except ImportError:
+        return {}
+    values = {}
+    try:
+        with Image.open(file_path) as image:
+            values['width'], values['height'] = image.size
+            exif = image.getexif()
+            tags = dict(exif)
+            tags.update(exif.get_ifd(0x8769))
+    except Exception:
+        return values
+    for tag, value in tags.items():
+        field = EXIF_TAGS.get(ExifTags.TAGS.get(tag))
+        if field and field not in values and value:
+            values[field] = str(value).strip('\x00 ')
+    if 'taken' in values:
+        try:
+            values['taken'] = datetime.datetime.strptime(values['taken'], '%Y:%m:%d %H:%M:%S')
+        except ValueError:
+            pass
+    camera = ' '.join(values[k] for k in ('make', 'model') if values.get(k))
+    if camera:
+        values['camera'] = camera
+    return values
+
+def load_csv(csv_path):
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames:
+            return {}
+        key_column = 'file' if 'file' in reader.fieldnames else reader.fieldnames[0]
+        rows = {}
+        for row in reader:
+            key = (row.get(key_column) or '').strip()
+            if key:
+                rows[key] = {column: value for column, value in row.items() if column}
+        return rows
+
+class FileTemplates:
+    def __init__(self, name_template='', description_template='', csv_rows=None, start_index=1):
+        self.name_template = Template(name_template) if name_template else None
+        self.description_template = Template(description_template)
+        self.csv_rows = csv_rows or {}
+        self.start_index = start_index
+        self.fields = self.description_template.fields | (self.name_template.fields if self.name_template else set())
+        self.needs_exif = bool(self.fields & set(EXIF_FIELDS))
+
+    def isStatic(self):
+        return self.name_template is None and not self.description_template.parts
+
+    def context(self, file_path, index, count):
+        base_name = os.path.basename(file_path)
+        stem, ext = os.path.splitext(base_name)
+        try:
+            stat = os.stat(file_path)
+            modified = datetime.datetime.fromtimestamp(stat.st_mtime)
+            size = stat.st_size
+        except OSError:
+            modified = datetime.datetime.now()
+            size = 0
+        context = {
+            'stem': stem,
+            'name': base_name,
+            'ext': ext.lstrip('.'),
+            'folder': os.path.basename(os.path.dirname(file_path)),
+            'index': index + self.start_index,
+            'count': count,
+            'date': modified.date(),
+            'time': modified.strftime('%H-%M-%S'),
+            'today': datetime.date.today(),
+            'size': size
+        }
+        if self.needs_exif:
+            context.update(read_exif(file_path))
+        row = self.csv_rows.get(base_name) or self.csv_rows.get(stem) or self.csv_rows.get(file_path)
+        if row:
+            context.update(row)
+        return context
+
+    def targetName(self, file_path, context):
+        if self.name_template is None:
+            return os.path.basename(file_path)
+        name = self.name_template.render(context).strip()
+        if not name:
+            return os.path.basename(file_path)
+        ext = os.path.splitext(file_path)[1]
+        if not name.lower().endswith(ext.lower()):
+            name += ext
+        return name
+
+    def checkFile(self, file_path, index=0, count=1):
+        context = self.context(file_path, index, count)
+        missing = self.description_template.missing(context)
+        if self.name_template is not None:
+            missing = self.name_template.missing(context) + missing
+        name = self.targetName(file_path, context)
+        return name, self.description_template.render(context), list(dict.fromkeys(missing))
+
+    def renderFile(self, file_path, index=0, count=1):
+        return self.checkFile(file_path, index, count)[:2]
+
+    def render(self, files):
+        count = len(files)
+        names = {}
+        descriptions = {}
+        for index, file_path in enumerate(files):
+            names[file_path], descriptions[file_path] = self.renderFile(file_path, index, count)
+        return names, descriptions
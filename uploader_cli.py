@@ -0,0 +1,156 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+
+from uploader_core import UploadEngine, FanOutEngine, scan_paths, parse_targets, format_size, format_duration
+from upload_state import SettingsStore
+from upload_templates import FileTemplates, load_csv
+
+SETTINGS_FILE = 'hamichlol_uploader_settings.ini'
+
+def load_defaults(argv):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--profile')
+    profile = parser.parse_known_args(argv)[0].profile
+    defaults = SettingsStore(SETTINGS_FILE)
+    if profile and profile not in defaults.profileNames():
+        print(f"הפרופיל {profile} לא נמצא בהגדרות", file=sys.stderr)
+        sys.exit(2)
+    defaults.active_profile = profile
+    return defaults
+
+def collect_files(patterns, recursive):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches:
+            print(f"לא נמצאו קבצים עבור {pattern}", file=sys.stderr)
+        for path in matches:
+            if os.path.isdir(path):
+                files.extend(scan_paths([path], recursive))
+            else:
+                files.append(path)
+    return list(dict.fromkeys(os.path.abspath(f) for f in files))
+
+def parse_args(argv, defaults):
+    parser = argparse.ArgumentParser(
+        prog='uploader_cli',
+        description="העלאת קבצים למכלול משורת הפקודה"
+    )
+    parser.add_argument('paths', nargs='+', help="קבצים, תיקיות או תבניות glob להעלאה")
+    parser.add_argument('-r', '--recursive', action='store_true', help="סריקת תיקיות משנה")
+    parser.add_argument('--profile', help="פרופיל העלאה שנשמר בממשק (אתר, תיאור, תקציר ומספר העלאות במקביל)")
+    parser.add_argument('--site', default=defaults.get('site', 'www.hamichlol.org.il'))
+    parser.add_argument('--username', default=defaults.get('username', ''))
+    parser.add_argument('--password', default=os.environ.get('HAMICHLOL_PASSWORD', defaults.get('password', '')),
+                        help="ברירת המחדל נלקחת מ-HAMICHLOL_PASSWORD או מקובץ ההגדרות")
+    parser.add_argument('--target', action='append', default=[], metavar='SITE[|USER[|PASSWORD]]',
+                        help="אתר נוסף להעלאה במקביל; ניתן לחזור על האפשרות")
+    parser.add_argument('--description', default=defaults.get('description', ''), help="תיאור העמוד")
+    parser.add_argument('--description-file', help="קובץ שממנו ייקרא תיאור העמוד")
+    parser.add_argument('--name-template', default=defaults.get('name_template', ''),
+                        help="תבנית לשמות היעד, למשל {stem}_{index:03d}")
+    parser.add_argument('--csv', help="קובץ CSV עם עמודות נוספות לתבניות, לפי עמודת file או העמודה הראשונה")
+    parser.add_argument('--summary', default=defaults.get('summary', ''), help="תקציר העריכה")
+    parser.add_argument('--concurrency', type=int, default=defaults.getint('concurrency', 4))
+    parser.add_argument('--chunk-size', type=int, default=defaults.getint('chunk_size', 5), help="גודל מקטע ב-MB")
+    parser.add_argument('--chunk-threshold', type=int, default=defaults.getint('chunk_threshold', 20),
+                        help="העלאה במקטעים לקבצים מעל גודל זה ב-MB")
+    parser.add_argument('--no-skip-duplicates', dest='skip_duplicates', action='store_false',
+                        default=defaults.getboolean('skip_duplicates', True))
+    parser.add_argument('--optimize', action='store_true', default=defaults.getboolean('optimize_images', False),
+                        help="אופטימיזציה לתמונות לפני ההעלאה")
+    parser.add_argument('--max-dimension', type=int, default=defaults.getint('max_dimension', 0),
+                        help="הקטנת תמונות לממד מרבי בפיקסלים (0 = ללא)")
+    parser.add_argument('--verify', action='store_true', default=defaults.getboolean('verify_uploads', False),
+                        help="אימות SHA-1 וגודל של הקבצים שהועלו והעלאה מחדש של קבצים פגומים")
+    parser.add_argument('--metrics', help="שמירת מדדי ביצועים לכל בקשה לקובץ JSONL, או CSV לפי הסיומת")
+    parser.add_argument('--json', action='store_true', help="הדפסת התוצאות כ-JSON")
+    parser.add_argument('-q', '--quiet', action='store_true', help="ללא הודעות התקדמות")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv, load_defaults(argv))
+
+    description = args.description
+    if args.description_file:
+        with open(args.description_file, 'r', encoding='utf-8') as f:
+            description = f.read()
+
+    files = collect_files(args.paths, args.recursive)
+    if not files:
+        print("לא נמצאו קבצים להעלאה", file=sys.stderr)
+        return 2
+
+    try:
+        templates = FileTemplates(args.name_template, description, load_csv(args.csv) if args.csv else None)
+    except Exception as e:
+        print(f"שגיאה בטעינת קובץ ה-CSV: {str(e)}", file=sys.stderr)
+        return 2
+    target_filenames, descriptions = {}, None
+    if not templates.isStatic():
+        target_filenames, descriptions = templates.render(files)
+    
+    def on_status(message):
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    last_stats = {}
+    
+    def on_stats(stats):
+        last_stats.update(stats)
+    
+    def on_progress(value):
+        if not args.quiet and sys.stderr.isatty():
+            line = f"{value}%"
+            if last_stats:
+                line += f" {format_size(last_stats['rate'])}/s, {format_duration(last_stats['eta'])}"
+            print(f"\r{line}   ", end='\n' if value >= 100 else '', file=sys.stderr, flush=True)
+
+    extra_targets = parse_targets('\n'.join(args.target), args.username, args.password)
+    if extra_targets:
+        targets = [{'site': args.site, 'username': args.username, 'password': args.password}] + extra_targets
+        engine_class, engine_args = FanOutEngine, (files, targets)
+    else:
+        engine_class, engine_args = UploadEngine, (files, args.site, args.username, args.password)
+    
+    engine = engine_class(
+        *engine_args, description, args.summary, target_filenames,
+        concurrency=args.concurrency, chunk_size=args.chunk_size * 1024 * 1024,
+        chunk_threshold=args.chunk_threshold * 1024 * 1024, skip_duplicates=args.skip_duplicates,
+        verify=args.verify, optimize={'max_dimension': args.max_dimension} if args.optimize else None, descriptions=descriptions,
+        metrics_path=args.metrics,
+        progress_callback=on_progress, status_callback=on_status, stats_callback=on_stats
+    )
+
+    try:
+        records = engine.run()
+    except Exception as e:
+        print(f"שגיאה כללית: {str(e)}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        counts = {}
+        for record in records:
+            counts[record['state']] = counts.get(record['state'], 0) + 1
+        output = {
+            'site': args.site,
+            'targets': [args.site] + [target['site'] for target in extra_targets],
+            'counts': counts,
+            'metrics': engine.metrics.summary(),
+            'results': records
+        }
+        json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for record in records:
+            print(record['message'])
+
+    return 1 if any(record['state'] == 'failed' for record in records) else 0
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
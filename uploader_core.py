@@ -0,0 +1,1634 @@
+import os
+import json
+import threading
+import uuid
+import time
+import re
+import random
+import queue
+import functools
+import shutil
+import tempfile
+import math
+import csv
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+
+import requests
+import urllib3
+
+from image_optimizer import optimize_file, OPTIMIZABLE_EXTENSIONS
+from upload_state import file_sha1, atomic_write, HashCache, UploadJournal
+
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.pdf')
+
+REQUEST_TIMEOUT = (10, 60)
+UPLOAD_TIMEOUT = (10, 300)
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.0f} KB"
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+def api_url(site):
+    base = site.rstrip('/') if '://' in site else f"https://{site}"
+    return f"{base}/w/api.php"
+
+def scan_paths(paths, recursive=True, should_stop=None):
+    pending = list(reversed(paths))
+    visited = set()
+    while pending:
+        if should_stop and should_stop():
+            return
+        path = pending.pop()
+        if not os.path.isdir(path):
+            if path.lower().endswith(SUPPORTED_EXTENSIONS) and os.path.isfile(path):
+                yield os.path.abspath(path)
+            continue
+        real_path = os.path.realpath(path)
+        if real_path in visited:
+            continue
+        visited.add(real_path)
+        try:
+            with os.scandir(path) as entries:
+                entries = sorted(entries, key=lambda e: e.name)
+        except OSError:
+            continue
+        directories = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        directories.append(entry.path)
+                elif entry.name.lower().endswith(SUPPORTED_EXTENSIONS) and entry.is_file():
+                    yield os.path.abspath(entry.path)
+            except OSError:
+                continue
+        pending.extend(reversed(directories))
+
+ILLEGAL_TITLE_CHARS = re.compile(r'[#<>\[\]|{}\x00-\x1f\x7f]')
+REPLACED_TITLE_CHARS = re.compile(r'[:/\\]')
+
+def upload_title(name):
+    return REPLACED_TITLE_CHARS.sub('-', name)
+
+def query_titles(session, api_url, titles, params, batch_size=50, workers=1):
+    def fetch(batch):
+        query_params = {'action': 'query', 'titles': '|'.join(batch), 'format': 'json'}
+        query_params.update(params)
+        r = session.post(api_url, data=query_params, timeout=REQUEST_TIMEOUT)
+        result = r.json().get('query', {})
+        normalized = {item['from']: item['to'] for item in result.get('normalized', [])}
+        by_title = {page['title']: page for page in result.get('pages', {}).values()}
+        return {title: by_title.get(normalized.get(title, title), {}) for title in batch}
+    
+    batches = [titles[start:start + batch_size] for start in range(0, len(titles), batch_size)]
+    pages = {}
+    if workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch_pages in executor.map(fetch, batches):
+                pages.update(batch_pages)
+    else:
+        for batch in batches:
+            pages.update(fetch(batch))
+    return pages
+
+def check_titles(session, api_url, names, workers=4):
+    statuses = {}
+    valid = []
+    for name in dict.fromkeys(names):
+        match = ILLEGAL_TITLE_CHARS.search(name)
+        if match:
+            statuses[name] = {'state': 'invalid', 'reason': f"התו {match.group()!r} אסור בשם קובץ"}
+        else:
+            valid.append(name)
+    
+    pages = query_titles(session, api_url, [f"File:{upload_title(name)}" for name in valid], {}, workers=workers)
+    for name in valid:
+        page = pages.get(f"File:{upload_title(name)}", {})
+        stored_name = page.get('title', '').split(':', 1)[-1] or upload_title(name)
+        if 'invalid' in page:
+            status = {'state': 'invalid', 'reason': page.get('invalidreason', '')}
+        elif page and 'missing' not in page:
+            status = {'state': 'exists'}
+        else:
+            status = {'state': 'missing'}
+        if stored_name and stored_name != name:
+            status['normalized'] = stored_name
+        statuses[name] = status
+    
+    counts = {}
+    for name in names:
+        stored_name = statuses[name].get('normalized', name)
+        counts[stored_name] = counts.get(stored_name, 0) + 1
+    for name, status in statuses.items():
+        status['duplicate'] = counts[status.get('normalized', name)] > 1
+    return statuses
+
+class MultipartFileStream:
+    def __init__(self, fields, file_field, file_name, file_path, progress_callback=None,
+                 offset=0, length=None, block_size=64 * 1024, reader=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.file_path = file_path
+        self.progress_callback = progress_callback
+        self.offset = offset
+        self.block_size = block_size
+        self.reader = reader
+        self.file_position = offset
+        self.block = b''
+        self.block_position = 0
+        self.remaining = os.path.getsize(file_path) - offset if length is None else length
+        
+        head = b''.join(self.fieldPart(name, value) for name, value in fields.items())
+        head += (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{self.quote(file_name)}"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode('utf-8')
+        self.head = head
+        self.tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self.len = len(self.head) + self.remaining + len(self.tail)
+        
+        self.stage = 0
+        self.position = 0
+        self.file = None
+        self.read_time = 0.0
+
+    @staticmethod
+    def quote(value):
+        return str(value).replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+    def fieldPart(self, name, value):
+        return (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{self.quote(name)}"\r\n\r\n'
+            f'{value}\r\n'
+        ).encode('utf-8')
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        while True:
+            data = self.read(self.block_size)
+            if not data:
+                break
+            yield data
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+        out = bytearray()
+        while len(out) < size and self.stage < 3:
+            if self.stage == 1:
+                if self.block_position >= len(self.block):
+                    self.block = self.readBlock() if self.remaining > 0 else b''
+                    self.block_position = 0
+                    if not self.block:
+                        self.close()
+                        self.stage = 2
+                        continue
+                data = self.block[self.block_position:self.block_position + size - len(out)]
+                self.block_position += len(data)
+                out += data
+                if self.progress_callback:
+                    self.progress_callback(len(data))
+            else:
+                buffer = self.head if self.stage == 0 else self.tail
+                data = buffer[self.position:self.position + size - len(out)]
+                self.position += len(data)
+                out += data
+                if self.position >= len(buffer):
+                    self.stage += 1
+                    self.position = 0
+        return bytes(out)
+
+    def readBlock(self):
+        if self.file is None:
+            self.file = open(self.file_path, 'rb')
+            self.file.seek(self.file_position)
+        length = min(self.block_size, self.remaining)
+        started = time.monotonic()
+        if self.reader is not None:
+            data = self.reader(self.file_path, self.file_position, length, self.file)
+        else:
+            data = self.file.read(length)
+        self.read_time += time.monotonic() - started
+        self.file_position += len(data)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class SharedBlockCache:
+    def __init__(self, consumers, paths, max_bytes=64 * 1024 * 1024):
+        self.consumers = consumers
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+        self.retired = set()
+        self.blocks = {}
+        self.finished = {}
+        self.aliases = {}
+        self.size = 0
+        self.disk_reads = 0
+        self.cache_reads = 0
+        self.lock = threading.Lock()
+
+    def read(self, consumer, file_path, position, length, file):
+        if file_path not in self.paths:
+            return file.read(length)
+        key = (file_path, position)
+        with self.lock:
+            entry = self.blocks.get(key)
+            if entry is not None and len(entry[0]) == length:
+                self.cache_reads += 1
+                self.consume(key, entry, consumer)
+                return entry[0]
+        
+        file.seek(position)
+        data = file.read(length)
+        with self.lock:
+            self.disk_reads += 1
+            waiting = set(range(self.consumers)) - {consumer} - self.retired - self.finished.get(file_path, set())
+            if waiting and key not in self.blocks and self.size + len(data) <= self.max_bytes:
+                self.blocks[key] = (data, waiting)
+                self.size += len(data)
+        return data
+
+    def consume(self, key, entry, consumer):
+        entry[1].discard(consumer)
+        if not entry[1]:
+            del self.blocks[key]
+            self.size -= len(entry[0])
+
+    def addAlias(self, source_path, file_path):
+        with self.lock:
+            self.paths.add(file_path)
+            self.aliases.setdefault(source_path, []).append(file_path)
+            self.finished[file_path] = set(self.finished.get(source_path, set()))
+
+    def release(self, consumer, file_path):
+        with self.lock:
+            for path in [file_path] + self.aliases.get(file_path, []):
+                self.finished.setdefault(path, set()).add(consumer)
+                for key in [key for key in self.blocks if key[0] == path]:
+                    self.consume(key, self.blocks[key], consumer)
+
+    def retire(self, consumer):
+        with self.lock:
+            self.retired.add(consumer)
+            for key in list(self.blocks):
+                self.consume(key, self.blocks[key], consumer)
+
+class SharedFileWork:
+    def __init__(self, block_cache=None):
+        self.block_cache = block_cache
+        self.futures = {}
+        self.optimizer = None
+        self.optimize_dir = None
+        self.lock = threading.Lock()
+
+    def start(self, workers):
+        self.optimize_dir = tempfile.mkdtemp(prefix='hamichlol_uploader_')
+        self.optimizer = ProcessPoolExecutor(max_workers=workers)
+
+    def close(self):
+        if self.optimizer is not None:
+            self.optimizer.shutdown(cancel_futures=True)
+            shutil.rmtree(self.optimize_dir, ignore_errors=True)
+            self.optimizer = None
+
+    def get(self, key, compute):
+        with self.lock:
+            future = self.futures.get(key)
+            owner = future is None
+            if owner:
+                future = self.futures[key] = Future()
+        if owner:
+            try:
+                future.set_result(compute())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+REQUEST_PHASES = ('wait', 'connect', 'tls', 'send', 'read', 'response', 'download', 'parse')
+METRIC_FIELDS = ('time', 'kind', 'file', 'attempt', 'status', 'bytes') + REQUEST_PHASES + ('total', 'error')
+
+_request_timings = threading.local()
+
+def request_timings():
+    if not hasattr(_request_timings, 'value'):
+        _request_timings.value = {}
+    return _request_timings.value
+
+def reset_request_timings():
+    _request_timings.value = {}
+    return _request_timings.value
+
+def add_timing(name, seconds):
+    timings = request_timings()
+    timings[name] = timings.get(name, 0.0) + seconds
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+class TimedConnectionMixin:
+    def _new_conn(self):
+        started = time.monotonic()
+        try:
+            return super()._new_conn()
+        finally:
+            add_timing('connect', time.monotonic() - started)
+
+    def request(self, *args, **kwargs):
+        timings = request_timings()
+        before = timings.get('connect', 0.0) + timings.get('tls', 0.0)
+        started = time.monotonic()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            connecting = timings.get('connect', 0.0) + timings.get('tls', 0.0) - before
+            add_timing('send', max(0.0, time.monotonic() - started - connecting))
+
+    def getresponse(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            add_timing('response', time.monotonic() - started)
+
+class TimedHTTPConnection(TimedConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnectionMixin, urllib3.connection.HTTPSConnection):
+    def connect(self):
+        timings = request_timings()
+        before = timings.get('connect', 0.0)
+        started = time.monotonic()
+        try:
+            return super().connect()
+        finally:
+            add_timing('tls', max(0.0, time.monotonic() - started - (timings.get('connect', 0.0) - before)))
+
+class TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+class UploadMetrics:
+    TRANSFER_KINDS = ('upload', 'chunk')
+    
+    def __init__(self):
+        self.records = []
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, kind, file=None, **values):
+        record = {'time': round(time.time(), 3), 'kind': kind, 'file': file}
+        for name, value in values.items():
+            record[name] = round(value, 4) if isinstance(value, float) else value
+        with self.lock:
+            self.records.append(record)
+
+    def summary(self):
+        with self.lock:
+            records = list(self.records)
+        elapsed = time.monotonic() - self.started
+        kinds = {}
+        for record in records:
+            kinds.setdefault(record['kind'], []).append(record)
+        
+        summary_kinds = {}
+        for kind, kind_records in kinds.items():
+            totals = [r['total'] for r in kind_records if r.get('total') is not None]
+            summary_kinds[kind] = {
+                'count': len(kind_records),
+                'p50': percentile(totals, 0.5),
+                'p95': percentile(totals, 0.95),
+                'mean': sum(totals) / len(totals) if totals else None
+            }
+        
+        sent = sum(r.get('bytes') or 0 for r in records if r['kind'] in self.TRANSFER_KINDS and r.get('status') == 200)
+        return {
+            'elapsed': elapsed,
+            'bytes': sent,
+            'throughput': sent / elapsed if elapsed > 0 else 0,
+            'kinds': summary_kinds,
+            'phases': {phase: sum(r.get(phase) or 0 for r in records if r['kind'] != 'file') for phase in REQUEST_PHASES}
+        }
+
+    def summaryLines(self):
+        summary = self.summary()
+        lines = [f"תפוקה: {format_size(summary['throughput'])}/s ({format_size(summary['bytes'])} ב-{summary['elapsed']:.1f} שניות)"]
+        for kind, values in summary['kinds'].items():
+            if values['p50'] is not None:
+                lines.append(f"{kind}: {values['count']} פעולות, p50 {values['p50']:.2f} שנ׳, p95 {values['p95']:.2f} שנ׳")
+        phases = {phase: total for phase, total in summary['phases'].items() if total > 0}
+        if phases:
+            lines.append("זמן לפי שלב: " + ", ".join(f"{phase} {total:.1f} שנ׳" for phase, total in phases.items()))
+        return lines
+
+    def export(self, path):
+        with self.lock:
+            records = list(self.records)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            if path.lower().endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=METRIC_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(records)
+            else:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+class TransferStats:
+    def __init__(self, window=5.0):
+        self.window = window
+        self.started = time.monotonic()
+        self.samples = deque([(self.started, 0)])
+        self.transferred = 0
+        self.active = {}
+        self.lock = threading.Lock()
+
+    def start(self, key, name, size):
+        with self.lock:
+            self.active[key] = [name, 0, size]
+
+    def add(self, key, count):
+        now = time.monotonic()
+        with self.lock:
+            self.transferred += count
+            if key in self.active:
+                self.active[key][1] += count
+            self.samples.append((now, self.transferred))
+            self.trim(now)
+
+    def finish(self, key):
+        with self.lock:
+            self.active.pop(key, None)
+
+    def trim(self, now):
+        while len(self.samples) > 1 and now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+
+    def snapshot(self, remaining):
+        now = time.monotonic()
+        with self.lock:
+            self.trim(now)
+            first_time, first_bytes = self.samples[0]
+            elapsed = now - first_time
+            rate = max(0, self.transferred - first_bytes) / elapsed if elapsed > 0 else 0
+            active = [list(state) for state in self.active.values()]
+            transferred = self.transferred
+        
+        file_rate = rate / len(active) if active else 0
+        files = [{'name': name, 'sent': sent, 'size': size,
+                  'eta': max(0, size - sent) / file_rate if file_rate else None}
+                 for name, sent, size in active]
+        total_elapsed = now - self.started
+        return {
+            'rate': rate,
+            'eta': max(0, remaining) / rate if rate else None,
+            'transferred': transferred,
+            'elapsed': total_elapsed,
+            'average': transferred / total_elapsed if total_elapsed > 0 else 0,
+            'files': files
+        }
+
+class AdaptiveLimiter:
+    def __init__(self, maximum=4):
+        self.maximum = maximum
+        self.limit = maximum
+        self.in_flight = 0
+        self.since_change = 0
+        self.average = None
+        self.baseline = None
+        self.resume_at = 0
+        self.condition = threading.Condition()
+
+    def setMaximum(self, maximum):
+        with self.condition:
+            self.maximum = max(1, maximum)
+            self.limit = self.maximum
+            self.since_change = 0
+            self.condition.notify_all()
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                elif self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                else:
+                    self.condition.wait()
+
+    def release(self, cost=None, throttled=False, delay=0):
+        with self.condition:
+            self.in_flight -= 1
+            self.since_change += 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self.since_change = 0
+                self.resume_at = max(self.resume_at, time.monotonic() + delay)
+            elif cost is not None:
+                self.average = cost if self.average is None else 0.8 * self.average + 0.2 * cost
+                self.baseline = self.average if self.baseline is None else min(self.baseline, self.average)
+                if self.since_change >= self.limit:
+                    if self.average > 3 * self.baseline and self.limit > 1:
+                        self.limit -= 1
+                        self.since_change = 0
+                    elif self.limit < self.maximum:
+                        self.limit += 1
+                        self.since_change = 0
+            self.condition.notify_all()
+
+class WikiSession:
+    TOKEN_ERRORS = ('badtoken', 'notloggedin', 'assertuserfailed', 'assertnameduserfailed')
+    RETRY_ERRORS = ('maxlag', 'ratelimited', 'readonly', 'internal_api_error_DBConnectionError')
+    
+    def __init__(self, site, username, password, pool_size=16, maxlag=5, max_retries=5):
+        self.site = site
+        self.username = username
+        self.password = password
+        self.api_url = api_url(site)
+        self.session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.csrf_token = None
+        self.maxlag = maxlag
+        self.max_retries = max_retries
+        self.limiter = AdaptiveLimiter(pool_size)
+        self.status_callback = None
+        self.metrics = None
+        self.lock = threading.Lock()
+
+    def accountName(self):
+        name = self.username.split('@')[0].replace('_', ' ').strip()
+        return name[:1].upper() + name[1:]
+
+    def login(self):
+        with self.lock:
+            if self.csrf_token:
+                return self.csrf_token
+            if self.session.cookies:
+                params = {
+                    'action': 'query',
+                    'meta': 'tokens|userinfo',
+                    'format': 'json'
+                }
+                query = self.session.get(self.api_url, params=params, timeout=REQUEST_TIMEOUT).json().get('query', {})
+                if query.get('userinfo', {}).get('name') == self.accountName():
+                    self.csrf_token = query['tokens']['csrftoken']
+                    return self.csrf_token
+            
+            login_started = time.monotonic()
+            login_token_params = {
+                'action': 'query',
+                'meta': 'tokens',
+                'type': 'login',
+                'format': 'json'
+            }
+            r = self.session.get(self.api_url, params=login_token_params, timeout=REQUEST_TIMEOUT)
+            login_token = r.json()['query']['tokens']['logintoken']
+            
+            login_params = {
+                'action': 'login',
+                'lgname': self.username,
+                'lgpassword': self.password,
+                'lgtoken': login_token,
+                'format': 'json'
+            }
+            r = self.session.post(self.api_url, data=login_params, timeout=REQUEST_TIMEOUT)
+            login_result = r.json()
+            
+            if self.metrics is not None:
+                self.metrics.add('login', total=time.monotonic() - login_started)
+            if login_result.get('login', {}).get('result') != 'Success':
+                raise Exception(f"התחברות נכשלה: {json.dumps(login_result)}")
+            
+            csrf_params = {
+                'action': 'query',
+                'meta': 'tokens',
+                'format': 'json'
+            }
+            r = self.session.get(self.api_url, params=csrf_params, timeout=REQUEST_TIMEOUT)
+            self.csrf_token = r.json()['query']['tokens']['csrftoken']
+            return self.csrf_token
+
+    def refreshToken(self, stale_token, code):
+        with self.lock:
+            if self.csrf_token != stale_token:
+                return
+            self.csrf_token = None
+            if code != 'badtoken':
+                self.session.cookies.clear()
+        self.login()
+
+    def post(self, params):
+        return self.send(params, lambda data: {'data': data})
+
+    def upload(self, params, file_field, file_name, file_path, progress_callback=None, offset=0, length=None,
+               reader=None):
+        streams = []
+        sent = [0]
+        
+        def on_sent(count):
+            sent[0] += count
+            if progress_callback:
+                progress_callback(count)
+        
+        def build(data):
+            if sent[0] and progress_callback:
+                progress_callback(-sent[0])
+            sent[0] = 0
+            stream = MultipartFileStream(data, file_field, file_name, file_path, on_sent, offset, length,
+                                         reader=reader)
+            streams.append(stream)
+            return {'data': stream, 'headers': {'Content-Type': stream.content_type}}
+        
+        try:
+            return self.send(params, build)
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def send(self, params, build):
+        refreshed = False
+        attempt = 0
+        while True:
+            token = self.login()
+            data = dict(params)
+            data['token'] = token
+            data['assert'] = 'user'
+            data['maxlag'] = self.maxlag
+            request = build(data)
+            body_size = len(request['data']) if hasattr(request['data'], '__len__') else 0
+            
+            wait_started = time.monotonic()
+            self.limiter.acquire()
+            started = time.monotonic()
+            timings = reset_request_timings()
+            timings['wait'] = started - wait_started
+            r, result, error, received = None, None, None, None
+            try:
+                timeout = UPLOAD_TIMEOUT if params.get('action') == 'upload' else REQUEST_TIMEOUT
+                r = self.session.post(self.api_url, timeout=timeout, **request)
+                received = time.monotonic()
+                if r.status_code < 500 and r.status_code != 429:
+                    result = r.json()
+            except (requests.ConnectionError, requests.Timeout, ValueError) as e:
+                error = e
+            if self.metrics is not None:
+                self.recordRequest(params, attempt, request, r, error, timings, started, received)
+            
+            if isinstance(error, ValueError) and 400 <= r.status_code < 500:
+                self.limiter.release(cost=(time.monotonic() - started) / (1 + body_size / (1024 * 1024)))
+                r.raise_for_status()
+            
+            code = result.get('error', {}).get('code') if result else None
+            if result is not None and code not in self.RETRY_ERRORS:
+                elapsed = time.monotonic() - started
+                self.limiter.release(cost=elapsed / (1 + body_size / (1024 * 1024)))
+                if code in self.TOKEN_ERRORS and not refreshed:
+                    refreshed = True
+                    self.refreshToken(token, code)
+                    continue
+                return result
+            
+            delay = self.retryDelay(r, attempt)
+            self.limiter.release(throttled=True, delay=delay)
+            attempt += 1
+            if attempt > self.max_retries:
+                if result is not None:
+                    return result
+                if error is not None:
+                    raise error
+                r.raise_for_status()
+            
+            reason = code or (f"HTTP {r.status_code}" if r is not None else type(error).__name__)
+            if self.status_callback:
+                self.status_callback(f"השרת עמוס ({reason}), ממתין {delay:.0f} שניות לפני ניסיון נוסף...")
+
+    def recordRequest(self, params, attempt, request, response, error, timings, started, received):
+        finished = time.monotonic()
+        if params.get('action') != 'upload':
+            kind = params.get('action', 'request')
+        elif params.get('stash'):
+            kind = 'chunk'
+        elif params.get('filekey'):
+            kind = 'commit'
+        else:
+            kind = 'upload'
+        
+        body = request['data']
+        values = dict(timings)
+        values['read'] = getattr(body, 'read_time', 0.0)
+        values['send'] = max(0.0, values.get('send', 0.0) - values['read'])
+        if received is not None:
+            values['parse'] = finished - received
+            values['download'] = max(0.0, received - started - sum(
+                timings.get(phase, 0.0) for phase in ('connect', 'tls', 'send', 'response')))
+        self.metrics.add(kind, params.get('filename'), attempt=attempt,
+                         status=response.status_code if response is not None else None,
+                         bytes=len(body) if isinstance(body, MultipartFileStream) else 0,
+                         total=finished - started + timings['wait'],
+                         error=type(error).__name__ if error is not None else None, **values)
+
+    @staticmethod
+    def retryDelay(response, attempt):
+        if response is not None:
+            try:
+                return max(0.0, float(response.headers.get('Retry-After', '')))
+            except ValueError:
+                pass
+        backoff = min(60.0, 2.0 ** attempt)
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def cookieState(self):
+        return [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+             'expires': c.expires, 'secure': c.secure}
+            for c in self.session.cookies
+        ]
+
+    def restoreCookies(self, cookies):
+        for c in cookies:
+            self.session.cookies.set(c['name'], c['value'], domain=c['domain'], path=c['path'],
+                                     expires=c['expires'], secure=c['secure'])
+
+class SessionManager:
+    def __init__(self, cookie_path=None):
+        self.cookie_path = cookie_path
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, site, username, password):
+        key = f"{site}|{username}"
+        with self.lock:
+            wiki = self.sessions.get(key)
+            if wiki is None or wiki.password != password:
+                wiki = WikiSession(site, username, password)
+                wiki.restoreCookies(self.loadCookies().get(key, []))
+                self.sessions[key] = wiki
+            return wiki
+
+    def loadCookies(self):
+        if not self.cookie_path:
+            return {}
+        try:
+            with open(self.cookie_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def saveCookies(self):
+        if not self.cookie_path:
+            return
+        with self.lock:
+            cookies = self.loadCookies()
+            for key, wiki in self.sessions.items():
+                cookies[key] = wiki.cookieState()
+        try:
+            atomic_write(self.cookie_path, lambda f: json.dump(cookies, f))
+        except Exception as e:
+            print(f"שגיאה בשמירת פרטי ההתחברות: {e}")
+
+class Pipeline:
+    STOP = object()
+    
+    def __init__(self, queue_size=32):
+        self.queue_size = queue_size
+        self.stages = []
+
+    def addStage(self, handler, workers=1, batch_size=1):
+        self.stages.append((handler, max(1, workers), batch_size))
+
+    def run(self, items, sink):
+        queue_size = max(self.queue_size, *(workers * 2 for _, workers, _ in self.stages))
+        queues = [queue.Queue(maxsize=queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self.feed, args=(items, queues[0]), daemon=True)]
+        for index, (handler, workers, batch_size) in enumerate(self.stages):
+            remaining = [workers]
+            lock = threading.Lock()
+            for _ in range(workers):
+                threads.append(threading.Thread(
+                    target=self.work, args=(handler, batch_size, queues[index], queues[index + 1], remaining, lock),
+                    daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+        
+        while True:
+            item = queues[-1].get()
+            if item is self.STOP:
+                break
+            sink(item)
+        for thread in threads:
+            thread.join()
+
+    def feed(self, items, output):
+        try:
+            for item in items:
+                output.put(item)
+        finally:
+            output.put(self.STOP)
+
+    def take(self, source, batch_size):
+        item = source.get()
+        if item is self.STOP:
+            return [], True
+        batch = [item]
+        while len(batch) < batch_size:
+            try:
+                item = source.get(timeout=0.05)
+            except queue.Empty:
+                break
+            if item is self.STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def work(self, handler, batch_size, source, output, remaining, lock):
+        while True:
+            batch, stopped = self.take(source, batch_size)
+            if batch:
+                try:
+                    handler(batch) if batch_size > 1 else handler(batch[0])
+                except Exception as e:
+                    for item in batch:
+                        item.setdefault('error', str(e))
+                for item in batch:
+                    output.put(item)
+            if stopped:
+                source.put(self.STOP)
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    output.put(self.STOP)
+                return
+
+class UploadEngine:
+    def __init__(self, files, site, username, password, description, summary, target_filenames, concurrency=4,
+                 chunk_size=5 * 1024 * 1024, chunk_threshold=20 * 1024 * 1024, chunk_retries=3,
+                 skip_duplicates=True, hash_cache=None, session_manager=None,
+                 journal_path='hamichlol_uploader_journal.jsonl', optimize=None, descriptions=None,
+                 metrics_path=None, progress_callback=None, status_callback=None, file_callback=None,
+                 stats_callback=None, stats_interval=0.25, verify=False, verify_rounds=2, upload_queue=None,
+                 journal=None, metrics=None, block_cache=None, cache_consumer=0, shared_work=None):
+        self.files = files if upload_queue is None else []
+        self.site = site
+        self.username = username
+        self.password = password
+        self.description = description
+        self.summary = summary
+        self.target_filenames = target_filenames
+        self.descriptions = descriptions or {}
+        self.concurrency = max(1, int(concurrency))
+        self.chunk_size = max(1024 * 1024, int(chunk_size))
+        self.chunk_threshold = int(chunk_threshold)
+        self.chunk_retries = max(1, int(chunk_retries))
+        self.skip_duplicates = skip_duplicates
+        self.hash_cache = hash_cache if hash_cache is not None else HashCache()
+        self.hash_workers = min(4, os.cpu_count() or 1)
+        self.session_manager = session_manager if session_manager is not None else SessionManager()
+        self.journal_path = journal_path
+        self.optimize_options = optimize
+        self.optimizer = None
+        self.optimize_dir = None
+        self.lookup_executor = None
+        self.saved_bytes = 0
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.file_callback = file_callback
+        self.verify = verify
+        self.verify_rounds = max(0, int(verify_rounds))
+        self.uploaded_items = []
+        self.upload_queue = upload_queue
+        self.queue_slots = threading.Semaphore(self.concurrency * 2)
+        self.queue_in_flight = 0
+        self.metrics_path = metrics_path
+        self.shared_metrics = metrics is not None
+        self.metrics = metrics if metrics is not None else UploadMetrics()
+        self.shared_journal = journal
+        self.block_cache = block_cache
+        self.cache_consumer = cache_consumer
+        self.block_reader = functools.partial(block_cache.read, cache_consumer) if block_cache is not None else None
+        self.shared_work = shared_work
+        self.stats_callback = stats_callback
+        self.stats_interval = stats_interval
+        self.last_stats = 0
+        self.transfers = None
+        self.results = []
+        self.wiki = None
+        self.total_files = 0
+        self.started_count = 0
+        self.bytes_total = 0
+        self.bytes_sent = 0
+        self.last_progress = -1
+        self.journal = None
+        self.done_keys = []
+        self.lock = threading.Lock()
+
+    def status(self, message):
+        if self.status_callback:
+            self.status_callback(message)
+
+    def progress(self, value):
+        if self.progress_callback:
+            self.progress_callback(value)
+
+    def emitStats(self, force=False):
+        if not self.stats_callback or self.transfers is None:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_stats < self.stats_interval:
+                return
+            self.last_stats = now
+            sent, total = self.bytes_sent, self.bytes_total
+        stats = self.transfers.snapshot(total - sent)
+        stats.update(sent=sent, total=total)
+        self.stats_callback(stats)
+
+    def fileStatus(self, index, state):
+        if self.file_callback:
+            self.file_callback(index, state)
+
+    def run(self):
+        self.status("מתחבר למכלול...")
+        
+        self.wiki = self.session_manager.get(self.site, self.username, self.password)
+        self.wiki.limiter.setMaximum(self.concurrency)
+        self.wiki.status_callback = self.status_callback
+        self.wiki.metrics = self.metrics
+        self.wiki.login()
+        
+        self.status("התחברות למכלול הצליחה")
+        
+        self.total_files = len(self.files)
+        self.results = [None] * self.total_files
+        self.bytes_total = sum(os.path.getsize(f) for f in self.files if os.path.exists(f))
+        self.journal = self.shared_journal or UploadJournal(self.journal_path)
+        self.transfers = TransferStats()
+        
+        transform_workers = os.cpu_count() or 1
+        pipeline = Pipeline()
+        pipeline.addStage(self.prepareItem, workers=self.hash_workers)
+        if self.skip_duplicates:
+            pipeline.addStage(self.checkItems, workers=2, batch_size=50)
+        if self.optimize_options is not None:
+            if self.shared_work is None:
+                self.optimize_dir = tempfile.mkdtemp(prefix='hamichlol_uploader_')
+                self.optimizer = ProcessPoolExecutor(max_workers=transform_workers)
+            pipeline.addStage(self.transformItem, workers=transform_workers)
+        pipeline.addStage(self.uploadItem, workers=self.concurrency)
+        
+        if self.upload_queue is not None:
+            items = self.queueItems()
+        else:
+            items = ({'index': i, 'path': file_path, 'target': self.targetName(file_path),
+                      'description': self.descriptions.get(file_path, self.description), 'sent': 0}
+                     for i, file_path in enumerate(self.files))
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as self.lookup_executor:
+                pipeline.run(items, self.finishItem)
+                if self.verify:
+                    self.verifyUploads()
+                    for item in self.uploaded_items:
+                        if 'queue_id' in item:
+                            self.upload_queue.finish(item['queue_id'], self.results[item['index']]['state'])
+        finally:
+            if self.optimizer is not None:
+                self.optimizer.shutdown(cancel_futures=True)
+                shutil.rmtree(self.optimize_dir, ignore_errors=True)
+                self.optimizer = None
+        
+        if self.saved_bytes > 0:
+            self.status(f"האופטימיזציה חסכה {format_size(self.saved_bytes)}")
+        
+        self.journal.discard(self.done_keys)
+        if self.shared_journal is None:
+            self.journal.compact()
+            self.journal.close()
+        self.hash_cache.save()
+        self.session_manager.saveCookies()
+        self.progress(100)
+        self.emitStats(force=True)
+        
+        for line in ([] if self.shared_metrics else self.metrics.summaryLines()):
+            self.status(line)
+        if self.metrics_path:
+            try:
+                self.metrics.export(self.metrics_path)
+            except Exception as e:
+                self.status(f"שמירת המדדים נכשלה: {str(e)}")
+        
+        self.status("העלאה הסתיימה")
+        return self.results
+
+    def targetName(self, file_path):
+        return self.target_filenames.get(file_path, os.path.basename(file_path))
+
+    def queueItems(self):
+        while True:
+            self.queue_slots.acquire()
+            entry = self.upload_queue.take(timeout=0.5)
+            if entry is None:
+                self.queue_slots.release()
+                with self.lock:
+                    idle = self.queue_in_flight == 0
+                if idle and not self.upload_queue.queuedCount():
+                    return
+                continue
+            
+            file_path = entry['path']
+            with self.lock:
+                self.queue_in_flight += 1
+                index = len(self.files)
+                self.files.append(file_path)
+                self.results.append(None)
+                self.total_files += 1
+                self.bytes_total += entry.get('size', 0)
+            yield {'index': index, 'path': file_path, 'queue_id': entry['id'],
+                   'target': self.target_filenames.get(file_path) or entry.get('target') or os.path.basename(file_path),
+                   'description': entry.get('description') or self.descriptions.get(file_path, self.description),
+                   'sent': 0}
+
+    def prepareItem(self, item):
+        path = item['path']
+        target_name = item['target'] = upload_title(item['target'])
+        try:
+            item['size'] = os.path.getsize(path)
+            item['key'] = UploadJournal.key(self.site, path, target_name)
+        except OSError as e:
+            item['record'] = self.record(path, os.path.basename(path), 'failed',
+                                         f"שגיאה בהעלאת {os.path.basename(path)}: {str(e)}")
+            return
+        item['entry'] = self.journal.get(item['key']) or {}
+        
+        if item['entry'].get('state') == 'done':
+            self.markDone(item['key'])
+            item['record'] = self.record(path, target_name, 'skipped',
+                                         f"הקובץ {target_name} כבר הועלה בהרצה קודמת, דולג")
+            return
+        
+        match = ILLEGAL_TITLE_CHARS.search(target_name)
+        if match:
+            item['record'] = self.record(path, target_name, 'failed',
+                                         f"שגיאה בהעלאת {target_name}: התו {match.group()!r} אסור בשם קובץ")
+            return
+        
+        if self.skip_duplicates:
+            uploaded = self.hash_cache.uploaded(path, self.site)
+            if uploaded:
+                self.markDuplicate(item, uploaded['target'])
+            else:
+                item['sha1'] = self.sharedResult(('sha1', path),
+                                                 functools.partial(self.hashFile, path, target_name, item['size']))
+
+    def checkItems(self, items):
+        pending = [item for item in items if 'record' not in item and 'sha1' in item]
+        if not pending:
+            return
+        started = time.monotonic()
+        try:
+            titles = [f"File:{item['target']}" for item in pending]
+            pages = query_titles(self.wiki.session, self.wiki.api_url, list(dict.fromkeys(titles)),
+                                 {'prop': 'imageinfo', 'iiprop': 'sha1|size'})
+            
+            remaining = []
+            for item, title in zip(pending, titles):
+                page = pages.get(title, {})
+                if page.get('imageinfo', [{}])[0].get('sha1') == item['sha1']:
+                    self.markDuplicate(item, page['title'].split(':', 1)[-1])
+                else:
+                    remaining.append(item)
+            
+            sha1s = [item['sha1'] for item in remaining]
+            for item, existing in zip(remaining, self.lookup_executor.map(self.findBySha1, sha1s)):
+                if existing:
+                    self.markDuplicate(item, existing[0])
+        except Exception as e:
+            self.status(f"בדיקת כפילויות נכשלה: {str(e)}")
+        self.metrics.add('check', None, files=len(pending), total=time.monotonic() - started)
+
+    def markDuplicate(self, item, existing_name):
+        self.hash_cache.recordUpload(item['path'], self.site, existing_name, item.get('sha1'))
+        item['record'] = self.record(item['path'], item['target'], 'skipped',
+                                     f"הקובץ {item['target']} כבר קיים במכלול בשם {existing_name}, דולג")
+
+    def findBySha1(self, sha1):
+        params = {
+            'action': 'query',
+            'list': 'allimages',
+            'aisha1': sha1,
+            'ailimit': 1,
+            'format': 'json'
+        }
+        r = self.wiki.session.get(self.wiki.api_url, params=params, timeout=REQUEST_TIMEOUT)
+        return [image['name'] for image in r.json().get('query', {}).get('allimages', [])]
+
+    def transformItem(self, item):
+        extension = os.path.splitext(item['path'])[1].lower()
+        if 'record' in item or extension not in OPTIMIZABLE_EXTENSIONS:
+            return
+        output_path = os.path.join((self.shared_work or self).optimize_dir, f"{item['index']}{extension}")
+        try:
+            result = self.sharedResult(('optimize', item['path']),
+                                       functools.partial(self.optimizeFile, item['path'], item['target'], output_path))
+        except Exception:
+            return
+        item['upload_path'] = result['path']
+        if self.skip_duplicates and result['path'] != item['path']:
+            item['upload_sha1'] = self.sharedResult(('sha1', result['path']), functools.partial(file_sha1, result['path']))
+            try:
+                existing = self.findBySha1(item['upload_sha1'])
+            except Exception as e:
+                self.status(f"בדיקת כפילויות נכשלה: {str(e)}")
+                existing = []
+            if existing:
+                self.markDuplicate(item, existing[0])
+                return
+        with self.lock:
+            self.saved_bytes += result['original_size'] - result['size']
+
+    def sharedResult(self, key, compute):
+        if self.shared_work is None:
+            return compute()
+        return self.shared_work.get(key, compute)
+
+    def hashFile(self, file_path, target_name, size):
+        started = time.monotonic()
+        sha1 = self.hash_cache.sha1(file_path)
+        self.metrics.add('hash', target_name, bytes=size, total=time.monotonic() - started)
+        return sha1
+
+    def optimizeFile(self, file_path, target_name, output_path):
+        started = time.monotonic()
+        result = (self.shared_work or self).optimizer.submit(optimize_file, file_path, output_path, self.optimize_options).result()
+        self.metrics.add('optimize', target_name, bytes=result['original_size'] - result['size'],
+                         total=time.monotonic() - started)
+        if self.block_cache is not None and result['path'] != file_path:
+            self.block_cache.addAlias(file_path, result['path'])
+        return result
+
+    def uploadItem(self, item):
+        if 'record' in item:
+            return
+        if 'queue_id' in item:
+            state = self.upload_queue.state(item['queue_id'])
+            if state == 'paused':
+                item['record'] = self.record(item['path'], item['target'], 'paused', f"הקובץ {item['target']} הושהה")
+                return
+            if state == 'cancelled':
+                item['record'] = self.record(item['path'], item['target'], 'cancelled',
+                                             f"ההעלאה של {item['target']} בוטלה")
+                return
+        if 'error' in item:
+            item['record'] = self.record(item['path'], item['target'], 'failed',
+                                         f"שגיאה בהעלאת {item['target']}: {item['error']}")
+            return
+        item['record'] = self.uploadFile(item)
+
+    def finishItem(self, item):
+        record = item.get('record') or self.record(item['path'], item['target'], 'failed',
+                                                   f"שגיאה בהעלאת {item['target']}: {item.get('error', '')}")
+        self.results[item['index']] = record
+        self.transfers.finish(item['index'])
+        if 'queue_id' in item:
+            if not (self.verify and record['state'] == 'uploaded'):
+                self.upload_queue.finish(item['queue_id'], record['state'])
+            with self.lock:
+                self.queue_in_flight -= 1
+            self.queue_slots.release()
+            self.upload_queue.notify()
+        if self.block_cache is not None:
+            self.block_cache.release(self.cache_consumer, item['path'])
+        if 'upload_started' in item:
+            self.metrics.add('file', item['target'], status=record['state'], bytes=item.get('size', 0),
+                             total=time.monotonic() - item['upload_started'])
+        self.fileStatus(item['index'], record['state'])
+        self.addSentBytes(item.get('size', 0) - item['sent'])
+        if self.verify and record['state'] == 'uploaded':
+            with self.lock:
+                self.uploaded_items.append(item)
+
+    def verifyUploads(self):
+        pending = sorted(self.uploaded_items, key=lambda item: item['index'])
+        verified = 0
+        for round_number in range(self.verify_rounds + 1):
+            if not pending:
+                break
+            self.status(f"מאמת {len(pending)} קבצים שהועלו...")
+            started = time.monotonic()
+            try:
+                failures = self.verifyItems(pending)
+            except Exception as e:
+                self.status(f"אימות הקבצים נכשל: {str(e)}")
+                return
+            self.metrics.add('verify', None, files=len(pending), total=time.monotonic() - started)
+            verified += len(pending) - len(failures)
+            if not failures:
+                break
+            
+            if round_number == self.verify_rounds:
+                for item, reason in failures:
+                    self.discardUpload(item)
+                    self.results[item['index']] = self.record(item['path'], item['target'], 'failed',
+                                                              f"הקובץ {item['target']} לא עבר אימות: {reason}")
+                    self.fileStatus(item['index'], 'failed')
+                break
+            
+            self.status(f"{len(failures)} קבצים לא עברו אימות, מעלה אותם מחדש...")
+            repaired = list(self.lookup_executor.map(self.repairItem, [item for item, _ in failures]))
+            pending = [item for item in repaired if self.results[item['index']]['state'] == 'uploaded']
+        
+        self.status(f"אומתו {verified} מתוך {len(self.uploaded_items)} קבצים שהועלו")
+
+    def verifyItems(self, items):
+        titles = [f"File:{item['target']}" for item in items]
+        pages = query_titles(self.wiki.session, self.wiki.api_url, list(dict.fromkeys(titles)),
+                             {'prop': 'imageinfo', 'iiprop': 'sha1|size'}, workers=4)
+        
+        failures = []
+        for item, title in zip(items, titles):
+            upload_path = item.get('upload_path', item['path'])
+            if upload_path == item['path']:
+                expected_sha1 = item.get('sha1') or self.hash_cache.sha1(upload_path)
+            else:
+                expected_sha1 = item.get('upload_sha1') or self.sharedResult(('sha1', upload_path),
+                                                                             functools.partial(file_sha1, upload_path))
+            expected_size = os.path.getsize(upload_path)
+            
+            info = pages.get(title, {}).get('imageinfo', [{}])[0]
+            if not info:
+                failures.append((item, "הקובץ לא נמצא במכלול"))
+            elif info.get('size') != expected_size:
+                failures.append((item, f"גודל {info.get('size')} במקום {expected_size}"))
+            elif info.get('sha1') != expected_sha1:
+                failures.append((item, "ה-SHA-1 אינו תואם"))
+            else:
+                self.results[item['index']]['verified'] = True
+        return failures
+
+    def repairItem(self, item):
+        with self.lock:
+            self.started_count -= 1
+        self.addSentBytes(-item['size'])
+        item['sent'] = 0
+        item['entry'] = {}
+        record = self.uploadFile(item)
+        if record['state'] == 'uploaded':
+            record['message'] = f"{record['message']} (הועלה מחדש לאחר אימות)"
+        else:
+            self.discardUpload(item)
+        self.results[item['index']] = record
+        self.transfers.finish(item['index'])
+        self.fileStatus(item['index'], record['state'])
+        self.addSentBytes(item['size'] - item['sent'])
+        return item
+
+    def uploadFile(self, item):
+        file_path = item['path']
+        target_name = item['target']
+        key = item['key']
+        entry = item['entry']
+        
+        def report(count):
+            item['sent'] += count
+            self.transfers.add(item['index'], count)
+            self.addSentBytes(count)
+        
+        try:
+            with self.lock:
+                self.started_count += 1
+                started = self.started_count
+            self.status(f"מעלה קובץ {started}/{self.total_files}: {os.path.basename(file_path)}")
+            self.fileStatus(item['index'], 'uploading')
+            item['upload_started'] = time.monotonic()
+            
+            upload_path = item.get('upload_path', file_path)
+            file_size = os.path.getsize(upload_path)
+            self.transfers.start(item['index'], target_name, file_size)
+            if not entry:
+                self.journal.record(key, state='uploading', path=file_path, target=target_name)
+            if file_size > self.chunk_threshold:
+                result = self.uploadChunked(upload_path, target_name, item['description'], file_size, key, entry, report)
+            else:
+                result = self.uploadWhole(upload_path, target_name, item['description'], report)
+            
+            if 'upload' in result and result['upload']['result'] == 'Success':
+                self.journal.record(key, state='done')
+                self.hash_cache.recordUpload(file_path, self.site, target_name, item.get('sha1'))
+                self.markDone(key)
+                return self.record(file_path, target_name, 'uploaded', f"הקובץ {target_name} הועלה בהצלחה")
+            if not (self.journal.get(key) or {}).get('filekey'):
+                self.journal.record(key, state='failed')
+            error_msg = result.get('error', {}).get('info', json.dumps(result))
+            return self.record(file_path, target_name, 'failed', f"שגיאה בהעלאת {target_name}: {error_msg}")
+        
+        except Exception as e:
+            return self.record(file_path, target_name, 'failed', f"שגיאה בהעלאת {target_name}: {str(e)}")
+
+    def record(self, file_path, target_name, state, message):
+        return {'file': file_path, 'target': target_name, 'state': state, 'message': message}
+
+    def markDone(self, key):
+        with self.lock:
+            self.done_keys.append(key)
+
+    def discardUpload(self, item):
+        self.hash_cache.forgetUpload(item['path'], self.site)
+        with self.lock:
+            self.done_keys = [key for key in self.done_keys if key != item['key']]
+        self.journal.discard([item['key']])
+
+    def uploadWhole(self, file_path, target_name, description, report):
+        upload_params = {
+            'action': 'upload',
+            'filename': target_name,
+            'comment': self.summary,
+            'text': description,
+            'ignorewarnings': 1,
+            'format': 'json'
+        }
+        
+        return self.wiki.upload(upload_params, 'file', target_name, file_path, report, reader=self.block_reader)
+
+    def uploadChunked(self, file_path, target_name, description, file_size, key, entry, report):
+        result = None
+        if entry.get('filekey'):
+            self.status(f"ממשיך את העלאת {target_name} מהיסט {entry['offset']}")
+            report(entry['offset'])
+            result = self.stashChunks(file_path, target_name, file_size, key, entry['offset'], entry['filekey'], report)
+            if result.get('upload', {}).get('result') != 'Success':
+                self.status(f"לא ניתן להמשיך את העלאת {target_name}, מתחיל מחדש")
+                report(-entry['offset'])
+                result = None
+        
+        if result is None:
+            result = self.stashChunks(file_path, target_name, file_size, key, 0, None, report)
+        if result.get('upload', {}).get('result') != 'Success':
+            return result
+        
+        commit_params = {
+            'action': 'upload',
+            'filename': target_name,
+            'filekey': result['upload']['filekey'],
+            'comment': self.summary,
+            'text': description,
+            'ignorewarnings': 1,
+            'format': 'json'
+        }
+        return self.wiki.post(commit_params)
+
+    def stashChunks(self, file_path, target_name, file_size, key, offset, filekey, report):
+        result = {'upload': {'result': 'Success', 'filekey': filekey}}
+        
+        while offset < file_size:
+            length = min(self.chunk_size, file_size - offset)
+            chunk_params = {
+                'action': 'upload',
+                'stash': 1,
+                'filename': target_name,
+                'filesize': file_size,
+                'offset': offset,
+                'ignorewarnings': 1,
+                'format': 'json'
+            }
+            if filekey:
+                chunk_params['filekey'] = filekey
+            
+            result = self.uploadChunk(chunk_params, file_path, target_name, offset, length, report)
+            upload = result.get('upload', {})
+            if upload.get('result') not in ('Continue', 'Success'):
+                return result
+            
+            filekey = upload['filekey']
+            offset = upload['offset'] if upload['result'] == 'Continue' else file_size
+            self.journal.record(key, state='stashed', offset=offset, filekey=filekey)
+        
+        return result
+
+    def uploadChunk(self, chunk_params, file_path, target_name, offset, length, report):
+        for attempt in range(self.chunk_retries):
+            sent = [0]
+            
+            def on_sent(count):
+                sent[0] += count
+                report(count)
+            
+            result = self.wiki.upload(chunk_params, 'chunk', target_name, file_path, on_sent, offset, length,
+                                      reader=self.block_reader)
+            if 'error' not in result:
+                return result
+            
+            report(-sent[0])
+            if attempt < self.chunk_retries - 1:
+                self.status(f"מקטע בהיסט {offset} של {target_name} נכשל, מנסה שוב...")
+                time.sleep(2 ** attempt)
+        return result
+
+    def addSentBytes(self, count):
+        with self.lock:
+            self.bytes_sent += count
+            progress = int((self.bytes_sent / self.bytes_total) * 100) if self.bytes_total else 0
+            changed = progress != self.last_progress
+            self.last_progress = progress
+        if changed:
+            self.progress(min(progress, 100))
+        self.emitStats()
+
+def parse_targets(text, username='', password=''):
+    targets = []
+    for line in text.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if not parts[0]:
+            continue
+        targets.append({
+            'site': parts[0],
+            'username': parts[1] if len(parts) > 1 and parts[1] else username,
+            'password': parts[2] if len(parts) > 2 and parts[2] else password
+        })
+    return targets
+
+class FanOutEngine:
+    def __init__(self, files, targets, description, summary, target_filenames, hash_cache=None,
+                 session_manager=None, journal_path='hamichlol_uploader_journal.jsonl', metrics_path=None,
+                 progress_callback=None, status_callback=None, file_callback=None, stats_callback=None,
+                 cache_bytes=64 * 1024 * 1024, **options):
+        self.files = files
+        self.targets = targets
+        self.hash_cache = hash_cache if hash_cache is not None else HashCache()
+        self.session_manager = session_manager if session_manager is not None else SessionManager()
+        self.journal_path = journal_path
+        self.metrics_path = metrics_path
+        self.metrics = UploadMetrics()
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.file_callback = file_callback
+        self.stats_callback = stats_callback
+        self.block_cache = SharedBlockCache(len(targets), files, cache_bytes)
+        self.shared_work = SharedFileWork(self.block_cache)
+        self.optimize_options = options.get('optimize')
+        self.journal = None
+        self.bytes_total = 0
+        self.bytes_failed = 0
+        self.last_progress = -1
+        self.file_states = {}
+        self.lock = threading.Lock()
+        self.engines = [
+            UploadEngine(
+                files, target['site'], target['username'], target['password'], description, summary,
+                target_filenames, hash_cache=self.hash_cache, session_manager=self.session_manager,
+                metrics=self.metrics, block_cache=self.block_cache, cache_consumer=i, shared_work=self.shared_work,
+                progress_callback=self.engineProgress, status_callback=functools.partial(self.engineStatus, target['site']),
+                file_callback=functools.partial(self.engineFileStatus, i), stats_callback=self.engineStats, **options
+            )
+            for i, target in enumerate(targets)
+        ]
+
+    def status(self, message):
+        if self.status_callback:
+            self.status_callback(message)
+
+    def engineStatus(self, site, message):
+        self.status(f"[{site}] {message}")
+
+    def engineProgress(self, value):
+        with self.lock:
+            sent = sum(engine.bytes_sent for engine in self.engines) + self.bytes_failed
+            progress = int(sent * 100 / self.bytes_total) if self.bytes_total else 0
+            if progress == self.last_progress:
+                return
+            self.last_progress = progress
+        if self.progress_callback:
+            self.progress_callback(min(progress, 100))
+
+    def engineFileStatus(self, consumer, index, state):
+        with self.lock:
+            states = self.file_states.setdefault(index, {})
+            previous = self.combinedState(states)
+            states[consumer] = state
+            combined = self.combinedState(states)
+        if combined != previous and self.file_callback:
+            self.file_callback(index, combined)
+
+    def combinedState(self, states):
+        if not states:
+            return None
+        finished = [state for state in states.values() if state != 'uploading']
+        if len(finished) < len(self.engines):
+            return 'uploading'
+        for state in ('failed', 'uploaded'):
+            if state in finished:
+                return state
+        return 'skipped'
+
+    def engineStats(self, stats):
+        if not self.stats_callback:
+            return
+        snapshots = []
+        for engine in self.engines:
+            if engine.transfers is not None:
+                snapshot = engine.transfers.snapshot(0)
+                for transfer in snapshot['files']:
+                    transfer['name'] = f"{engine.site}: {transfer['name']}"
+                snapshots.append(snapshot)
+        sent = sum(engine.bytes_sent for engine in self.engines) + self.bytes_failed
+        rate = sum(snapshot['rate'] for snapshot in snapshots)
+        elapsed = max((snapshot['elapsed'] for snapshot in snapshots), default=0)
+        transferred = sum(snapshot['transferred'] for snapshot in snapshots)
+        self.stats_callback({
+            'sent': sent,
+            'total': self.bytes_total,
+            'rate': rate,
+            'eta': max(0, self.bytes_total - sent) / rate if rate else None,
+            'transferred': transferred,
+            'elapsed': elapsed,
+            'average': transferred / elapsed if elapsed > 0 else 0,
+            'files': [transfer for snapshot in snapshots for transfer in snapshot['files']]
+        })
+
+    def run(self):
+        file_bytes = sum(os.path.getsize(f) for f in self.files if os.path.exists(f))
+        self.bytes_total = file_bytes * len(self.engines)
+        self.journal = UploadJournal(self.journal_path)
+        for engine in self.engines:
+            engine.shared_journal = self.journal
+        if self.optimize_options is not None:
+            self.shared_work.start(os.cpu_count() or 1)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=len(self.engines)) as executor:
+                outcomes = list(executor.map(lambda i: self.runEngine(i, file_bytes), range(len(self.engines))))
+        finally:
+            self.shared_work.close()
+            self.journal.compact()
+            self.journal.close()
+        
+        self.status(f"נקראו {self.block_cache.disk_reads} בלוקים מהדיסק ו-{self.block_cache.cache_reads} מהמטמון המשותף")
+        for line in self.metrics.summaryLines():
+            self.status(line)
+        if self.metrics_path:
+            try:
+                self.metrics.export(self.metrics_path)
+            except Exception as e:
+                self.status(f"שמירת המדדים נכשלה: {str(e)}")
+        if self.progress_callback:
+            self.progress_callback(100)
+        
+        records = []
+        for target, target_records in zip(self.targets, outcomes):
+            for record in target_records:
+                record = dict(record, site=target['site'], message=f"[{target['site']}] {record['message']}")
+                records.append(record)
+        self.status("העלאה הסתיימה")
+        return records
+
+    def runEngine(self, consumer, file_bytes):
+        engine = self.engines[consumer]
+        try:
+            return engine.run()
+        except Exception as e:
+            self.engineStatus(engine.site, f"שגיאה: {str(e)}")
+            self.block_cache.retire(consumer)
+            with self.lock:
+                self.bytes_failed += max(0, file_bytes - engine.bytes_sent)
+            records = []
+            for index, file_path in enumerate(self.files):
+                record = engine.results[index] if index < len(engine.results) else None
+                if record is None:
+                    record = engine.record(file_path, engine.targetName(file_path), 'failed', f"שגיאה כללית: {str(e)}")
+                    self.engineFileStatus(consumer, index, 'failed')
+                records.append(record)
+            return records